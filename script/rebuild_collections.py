@@ -1,16 +1,68 @@
-from qdrant_client import QdrantClient
-from qdrant_client.http import models as qm
+from pathlib import Path
+import asyncio
 import os
+import sys
+
+from qdrant_client import AsyncQdrantClient
+
+# Same collection settings as the server, from a module that does not pull in the indexer's dependencies.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from server.services.collection_settings import (  # noqa: E402
+    PAYLOAD_INDEX_FIELDS,
+    QDRANT_GRPC_PORT,
+    QDRANT_PREFER_GRPC,
+    hnsw_config,
+    quantization_config,
+    vector_params,
+)
 
 url = os.getenv("QDRANT_URL", "http://localhost:6333")
 code = os.getenv("COLLECTION_CODE", "code_chunks")
 func = os.getenv("COLLECTION_FUNCS", "functions")
+dim = int(os.getenv("DIM", "0")) or None
+quant_mode = os.getenv("QUANT_MODE", "scalar").strip().lower()
+vector_datatype = os.getenv("VECTOR_DATATYPE", "float16").strip().lower()
 
-cli = QdrantClient(url=url)
 
-for name in (code, func):
+async def main():
+    names = (code, func)
+    # Validate settings before anything is deleted: unknown modes/datatypes raise instead of building plain collections.
+    quantization = quantization_config(quant_mode)
+    vectors = vector_params(dim, quant_mode, vector_datatype) if dim else None
+    cli = AsyncQdrantClient(url=url, prefer_grpc=QDRANT_PREFER_GRPC, grpc_port=QDRANT_GRPC_PORT)
     try:
-        cli.delete_collection(name)
-    except Exception:
-        pass
-print("Collections cleared. Re-index repository.")
+        # Deletes are independent; issue them together instead of one flush round trip per collection.
+        await asyncio.gather(*(cli.delete_collection(name) for name in names), return_exceptions=True)
+
+        if not dim:
+            print("Collections cleared. Re-index repository.")
+            return
+
+        await asyncio.gather(
+            *(
+                cli.create_collection(
+                    collection_name=name,
+                    vectors_config=vectors,
+                    quantization_config=quantization,
+                    hnsw_config=hnsw_config(),
+                    on_disk_payload=True,
+                )
+                for name in names
+            )
+        )
+        await asyncio.gather(
+            *(
+                cli.create_payload_index(name, field_name=field, field_schema=schema)
+                for name in names
+                for field, schema in PAYLOAD_INDEX_FIELDS.items()
+            )
+        )
+        print(
+            f"Collections recreated (dim={dim}, datatype={vector_datatype}, quantization={quant_mode}). "
+            "Re-index repository."
+        )
+    finally:
+        await cli.close()
+
+
+asyncio.run(main())
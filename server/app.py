@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 
 from server.config import Config
@@ -15,6 +17,8 @@ from server.routers.registry_router import router as registry_router
 from server.routers.registry_ui import router as registry_ui_router
 from server.routers.search_router import router as search_router
 from server.routers.status_router import router as status_router
+from server.services.embedding_batcher import EmbeddingBatcher
+from server.services.embedding_cache import QueryEmbeddingCache
 from server.services.initializers import Initializer
 from server.services.mcp_service import MCPService
 from server.services.repository_registry import RepositoryRegistry
@@ -31,16 +35,29 @@ def create_app(config: Config | None = None) -> FastAPI:
     async def lifespan(app: FastAPI):
         if cfg.SKIP_COLLECTION_INIT:
             logger.info("Skipping default collection initialization (SKIP_COLLECTION_INIT set).")
+        else:
+            app.state.initializer.ensure_default_collection()
+        try:
             yield
-            return
-        app.state.initializer.ensure_default_collection()
-        yield
+        finally:
+            await app.state.embedding_batcher.aclose()
+            await app.state.initializer.aclose()
+            app.state.index_executor.shutdown(wait=False, cancel_futures=True)
 
-    app = FastAPI(title="Git RAG API", lifespan=lifespan)
+    # Search responses are large lists of floats/payload dicts; orjson serializes them far faster than stdlib json.
+    app = FastAPI(title="Git RAG API", lifespan=lifespan, default_response_class=ORJSONResponse)
 
     app.state.config = cfg
     app.state.registry = RepositoryRegistry(db_path=cfg.REGISTRY_DB_PATH, db_dir=cfg.REGISTRY_DB_DIR)
     app.state.initializer = Initializer(cfg)
+    app.state.embedding_batcher = EmbeddingBatcher(
+        app.state.initializer,
+        max_batch=cfg.EMBED_BATCH_MAX,
+        max_wait_ms=cfg.EMBED_BATCH_WAIT_MS,
+        cache=QueryEmbeddingCache(maxsize=cfg.QUERY_CACHE_SIZE, ttl_s=cfg.QUERY_CACHE_TTL_S),
+    )
+    # Index streams run on their own pool so long jobs cannot starve the shared threadpool used by other routes.
+    app.state.index_executor = ThreadPoolExecutor(max_workers=cfg.INDEX_WORKERS, thread_name_prefix="index")
     app.state.sandbox_manager = SandboxManager(cfg.REPOS_DIR, cfg.BRANCH)
     app.state.mcp_service = MCPService(cfg.MCP_MODULE) if cfg.EXPOSE_MCP_UI else None
 
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import os
-import re
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional
@@ -12,6 +11,21 @@ from dotenv import load_dotenv
 load_dotenv(dotenv_path=Path(__file__).resolve().parent.parent / ".env", override=False)
 
 
+class _SlugTable(dict):
+    """str.translate table keeping [a-z0-9] and deleting every other code point (incl. non-ASCII)."""
+
+    def __missing__(self, key: int) -> None:
+        return None
+
+
+_SLUG_TABLE = _SlugTable({c: c for c in b"abcdefghijklmnopqrstuvwxyz0123456789"})
+_TRUTHY = frozenset({"1", "true", "yes"})
+
+
+def _env_flag(key: str, default: str) -> bool:
+    return os.getenv(key, default).lower() in _TRUTHY
+
+
 @dataclass
 class Config:
     """Shared configuration loaded from environment variables."""
@@ -35,17 +49,24 @@ class Config:
     MCP_MODULE: str = field(default_factory=lambda: os.getenv("MCP_MODULE", "server.git_rag_mcp"))
     STACK_TYPE: Optional[str] = field(default_factory=lambda: os.getenv("STACK_TYPE"))
     ALLOW_DATA_RESET: bool = field(default=False)
+    QUANT_MODE: str = field(default_factory=lambda: os.getenv("QUANT_MODE", "scalar").strip().lower())
+    VECTOR_DATATYPE: str = field(default_factory=lambda: os.getenv("VECTOR_DATATYPE", "float16").strip().lower())
+    EMBED_BATCH_MAX: int = field(default_factory=lambda: max(1, int(os.getenv("EMBED_BATCH_MAX", "64"))))
+    EMBED_BATCH_WAIT_MS: float = field(default_factory=lambda: float(os.getenv("EMBED_BATCH_WAIT_MS", "5")))
+    QUERY_CACHE_SIZE: int = field(default_factory=lambda: max(0, int(os.getenv("QUERY_CACHE_SIZE", "4096"))))
+    QUERY_CACHE_TTL_S: float = field(default_factory=lambda: float(os.getenv("QUERY_CACHE_TTL_S", "3600")))
+    INDEX_WORKERS: int = field(default_factory=lambda: max(1, int(os.getenv("INDEX_WORKERS", "4"))))
 
     def __post_init__(self) -> None:
-        self.SKIP_COLLECTION_INIT = os.getenv("SKIP_COLLECTION_INIT", "0").lower() in {"1", "true", "yes"}
-        self.EXPOSE_MCP_UI = os.getenv("EXPOSE_MCP_UI", "1").lower() in {"1", "true", "yes"}
-        model_slug = re.sub(r"[^a-z0-9]+", "", self.EMB_MODEL.lower())
+        self.SKIP_COLLECTION_INIT = _env_flag("SKIP_COLLECTION_INIT", "0")
+        self.EXPOSE_MCP_UI = _env_flag("EXPOSE_MCP_UI", "1")
+        model_slug = self.EMB_MODEL.lower().translate(_SLUG_TABLE)
         self.COLLECTION = f"git_rag-{self.ENV}-{model_slug}"
         self.REGISTRY_DB_DIR = self._resolve_optional_path("REGISTRY_DB_DIR") or (self.REPOS_DIR / "registry_db")
         self.REGISTRY_DB_PATH = self._resolve_registry_db_path()
         self.HOST_REPO_PATH = self._resolve_optional_path("HOST_REPO_PATH")
         self.QDRANT_STORAGE_PATH = self._resolve_qdrant_storage_path()
-        self.ALLOW_DATA_RESET = os.getenv("ALLOW_DATA_RESET", "0").lower() in {"1", "true", "yes"}
+        self.ALLOW_DATA_RESET = _env_flag("ALLOW_DATA_RESET", "0")
 
     def _resolve_optional_path(self, env_key: str) -> Optional[Path]:
         raw = os.getenv(env_key)
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class SearchRequest(BaseModel):
@@ -13,3 +13,19 @@ class SearchRequest(BaseModel):
     component_type: Optional[str] = None
     screen_name: Optional[str] = None
     tags: Optional[List[str]] = None
+    logical_ids: Optional[List[str]] = None
+    no_cache: bool = False
+    ef: Optional[int] = Field(default=None, ge=1)
+
+
+class SearchBatchRequest(BaseModel):
+    queries: List[str]
+    repo_id: Optional[str] = None
+    k: int = 5
+    stack_type: Optional[str] = None
+    component_type: Optional[str] = None
+    screen_name: Optional[str] = None
+    tags: Optional[List[str]] = None
+    logical_ids: Optional[List[str]] = None
+    no_cache: bool = False
+    ef: Optional[int] = Field(default=None, ge=1)
@@ -1,16 +1,26 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
-from typing import List, Optional, Tuple
+from concurrent.futures import Executor, Future, wait
+from typing import AsyncIterator, Iterator, List, Optional, Set, Tuple
 from datetime import datetime
 
 from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import StreamingResponse
-from qdrant_client.models import PointStruct
 
 from server.config import Config
-from server.services.git_aware_code_indexer import Chunker, DiffUtil, GitCLI, Indexer, ChunkPlugin, PayloadPlugin
+from server.services.git_aware_code_indexer import (
+    INDEX_PIPELINE_WINDOW,
+    Chunk,
+    Chunker,
+    ChunkPlugin,
+    DiffUtil,
+    GitCLI,
+    Indexer,
+    PayloadPlugin,
+)
 from server.services.edges import StructuralEdgePlugin
 from server.services.android_plugins import AndroidChunkPlugin, AndroidPayloadPlugin
 from server.services.initializers import Initializer
@@ -19,8 +29,8 @@ from server.services.state_manager import (
     get_repo_path,
     list_git_repositories,
     load_state,
-    save_state,
     sync_state_with_registry,
+    update_state,
 )
 
 logger = logging.getLogger(__name__)
@@ -75,15 +85,41 @@ def list_repos(request: Request):
 
 
 @router.post("/{repo_id}/index/full")
-def full_index(request: Request, repo_id: str, stack_type: Optional[str] = None):
+async def full_index(request: Request, repo_id: str, stack_type: Optional[str] = None):
     generator = _generate_full_index_progress(request, repo_id, stack_type)
-    return StreamingResponse(generator, media_type="application/json")
+    return StreamingResponse(_stream_in_executor(request, generator), media_type="application/json")
 
 
 @router.post("/{repo_id}/index/update")
-def update_index(request: Request, repo_id: str, stack_type: Optional[str] = None):
+async def update_index(request: Request, repo_id: str, stack_type: Optional[str] = None):
     generator = _generate_update_index_progress(request, repo_id, stack_type)
-    return StreamingResponse(generator, media_type="application/json")
+    return StreamingResponse(_stream_in_executor(request, generator), media_type="application/json")
+
+
+async def _stream_in_executor(request: Request, generator: Iterator[str]) -> AsyncIterator[str]:
+    """Advance a blocking progress generator on the dedicated index pool, one line at a time."""
+    executor: Executor = request.app.state.index_executor
+    loop = asyncio.get_running_loop()
+    done = object()
+    step: Optional[Future] = None
+    try:
+        while True:
+            step = executor.submit(next, generator, done)
+            line = await asyncio.wrap_future(step)
+            if line is done:
+                break
+            yield line
+    finally:
+        # On client disconnect, close the generator on the pool too, so its cleanup (bulk_load restore, writer join)
+        # runs there instead of at GC time on the event loop.
+        await loop.run_in_executor(executor, _close_after_step, generator, step)
+
+
+def _close_after_step(generator: Iterator[str], step: Optional[Future]) -> None:
+    # A cancelled await leaves `next` running on the pool; closing before it returns raises "already executing".
+    if step is not None:
+        wait([step])
+    generator.close()
 
 
 def _generate_full_index_progress(request: Request, repo_id: str, stack_type_override: Optional[str] = None):
@@ -137,46 +173,39 @@ def _generate_full_index_progress(request: Request, repo_id: str, stack_type_ove
             }
         ) + "\n"
 
-        for path in files:
-            head_src = indexer.git.show_file(head, path) or ""
-            if head_src:
-                file_chunks = Chunker.chunks(
-                    head_src,
-                    path,
-                    repo_id,
-                    stack_type=stack_type,
-                    plugins=chunk_plugins,
-                )
-                if file_chunks:
-                    texts = [c.content for c in file_chunks]
-                    vectors = emb_client.embed(texts)
-                    points = []
-                    for c, v in zip(file_chunks, vectors):
-                        payload = indexer._build_payload(c, config.BRANCH, head)
-                        points.append(PointStruct(id=payload["point_id"], vector=v, payload=payload))
-                    if points:
-                        store_client.upsert_points(points)
-
-                    processed += 1
-                    registry.update_index_status(
+        # Files are embedded and stored in windows of about INDEX_PIPELINE_WINDOW chunks, so small files share the
+        # stored-vector lookup, embedding requests and upsert; each file is reported once its window is written.
+        window: List[Chunk] = []
+        window_files: List[Tuple[str, str]] = []
+        # One HNSW build after the last file instead of incremental rebuilds while segments fill.
+        with store_client.bulk_load():
+            for i, path in enumerate(files):
+                head_src = indexer.git.show_file(head, path) or ""
+                if head_src:
+                    file_chunks = Chunker.chunks(
+                        head_src,
+                        path,
                         repo_id,
-                        status="running",
-                        mode="full",
-                        processed_files=processed,
-                        total_files=total_files,
-                        current_file=path,
+                        stack_type=stack_type,
+                        plugins=chunk_plugins,
                     )
-                    yield json.dumps(
-                        {
-                            "status": "processing",
-                            "message": f"Processed file: {path}",
-                            "file": path,
-                            "total_files": total_files,
-                            "processed_files": processed,
-                            "last_commit": head,
-                        }
-                    ) + "\n"
+                    window.extend(file_chunks)
+                    message = f"Processed file: {path}" if file_chunks else f"Skipped empty file: {path}"
                 else:
+                    message = f"Skipped missing file: {path}"
+                window_files.append((path, message))
+                if len(window) < INDEX_PIPELINE_WINDOW and i + 1 < len(files):
+                    continue
+
+                written: Set[str] = set()
+                if window:
+                    vectors = indexer._embed_chunks(window)
+                    payloads = [indexer._build_payload(c, config.BRANCH, head) for c in window]
+                    written.update(p["point_id"] for p in payloads)
+                    store_client.upsert_batch([p["point_id"] for p in payloads], vectors, payloads)
+                # Windows hold whole files, so anything else still latest for these paths is stale.
+                indexer._retire_unwritten([done_path for done_path, _ in window_files], written)
+                for done_path, message in window_files:
                     processed += 1
                     registry.update_index_status(
                         repo_id,
@@ -184,42 +213,21 @@ def _generate_full_index_progress(request: Request, repo_id: str, stack_type_ove
                         mode="full",
                         processed_files=processed,
                         total_files=total_files,
-                        current_file=path,
+                        current_file=done_path,
                     )
                     yield json.dumps(
                         {
                             "status": "processing",
-                            "message": f"Skipped empty file: {path}",
-                            "file": path,
+                            "message": message,
+                            "file": done_path,
                             "total_files": total_files,
                             "processed_files": processed,
                             "last_commit": head,
                         }
                     ) + "\n"
-            else:
-                processed += 1
-                registry.update_index_status(
-                    repo_id,
-                    status="running",
-                    mode="full",
-                    processed_files=processed,
-                    total_files=total_files,
-                    current_file=path,
-                )
-                yield json.dumps(
-                    {
-                        "status": "processing",
-                        "message": f"Skipped missing file: {path}",
-                        "file": path,
-                        "total_files": total_files,
-                        "processed_files": processed,
-                        "last_commit": head,
-                    }
-                ) + "\n"
+                window, window_files = [], []
 
-        state = load_state(config.STATE_FILE)
-        state[repo_id] = head
-        save_state(config.STATE_FILE, state)
+        update_state(config.STATE_FILE, repo_id, head)
         registry.update_index_status(
             repo_id,
             last_indexed_commit=head,
@@ -363,33 +371,21 @@ def _generate_update_index_progress(request: Request, repo_id: str, stack_type_o
 
         for fd in file_diffs:
             if fd.is_deleted:
-                base_src = indexer.git.show_file(base, fd.path) or ""
-                if base_src:
-                    try:
-                        base_chunks = {
-                            c.symbol: c
-                            for c in Chunker.chunks(
-                                base_src,
-                                fd.path,
-                                repo_id,
-                                stack_type=stack_type,
-                                plugins=chunk_plugins,
-                            )
-                        }
-                        remove_ids = []
-                        for _, ch in base_chunks.items():
-                            olds = store_client.scroll_by_logical(ch.logical_id, is_latest=True)
-                            remove_ids.extend([p.id for p in olds])
-                        if remove_ids:
-                            from qdrant_client.http.models import PointIdsList
-
-                            store_client.client.delete(
-                                collection_name=repo_entry.collection_name,
-                                points_selector=PointIdsList(points=remove_ids),
-                            )
-                            logger.info("[DELETE] Removed %s vectors for %s", len(remove_ids), fd.path)
-                    except Exception as exc:
-                        logger.error("Failed to remove deleted file %s: %s", fd.path, exc)
+                try:
+                    # Look the file's points up by path rather than re-chunking the base revision, so points
+                    # indexed under logical ids an older chunker produced are removed too.
+                    olds_by_logical = store_client.latest_by_path(repo_id, [fd.path], fields=())[fd.path]
+                    remove_ids = [p.id for olds in olds_by_logical.values() for p in olds]
+                    if remove_ids:
+                        from qdrant_client.http.models import PointIdsList
+
+                        store_client.client.delete(
+                            collection_name=repo_entry.collection_name,
+                            points_selector=PointIdsList(points=remove_ids),
+                        )
+                        logger.info("[DELETE] Removed %s vectors for %s", len(remove_ids), fd.path)
+                except Exception as exc:
+                    logger.error("Failed to remove deleted file %s: %s", fd.path, exc)
 
                 processed += 1
                 registry.update_index_status(
@@ -462,9 +458,13 @@ def _generate_update_index_progress(request: Request, repo_id: str, stack_type_o
 
             to_embed = []
             to_update_only_pos = []
+            prev_by_logical = store_client.latest_by_path(repo_id, [fd.path], fields=())[fd.path]
+            live = {chunk.logical_id for chunk in head_chunks.values()}
+            # Points under logical ids the chunker no longer produces for this file would otherwise stay latest.
+            retire_ids = [p.id for logical_id, olds in prev_by_logical.items() if logical_id not in live for p in olds]
 
             for symbol, chunk in head_chunks.items():
-                olds = store_client.scroll_by_logical(chunk.logical_id, is_latest=True)
+                olds = prev_by_logical.get(chunk.logical_id, [])
                 if not olds:
                     to_embed.append(chunk)
                     continue
@@ -477,24 +477,21 @@ def _generate_update_index_progress(request: Request, repo_id: str, stack_type_o
                 else:
                     to_update_only_pos.append((chunk, relocalized))
 
+            updates = [
+                (
+                    [p.id for p in prev_by_logical[chunk.logical_id]],
+                    {"lines": [translated.start_line, translated.end_line]},
+                )
+                for chunk, translated in to_update_only_pos
+            ]
+            retire_ids.extend(p.id for chunk in to_embed for p in prev_by_logical.get(chunk.logical_id, []))
+            updates.append((retire_ids, {"is_latest": False}))
+            if to_embed:
+                vectors = indexer._embed_chunks(to_embed)
+                payloads = [indexer._build_payload(chunk, config.BRANCH, commit_sha) for chunk in to_embed]
+            store_client.set_payloads(updates)
             if to_embed:
-                texts = [c.content for c in to_embed]
-                vectors = emb_client.embed(texts)
-                points = []
-                for chunk, vector in zip(to_embed, vectors):
-                    olds = store_client.scroll_by_logical(chunk.logical_id, is_latest=True)
-                    if olds:
-                        store_client.set_payload([p.id for p in olds], {"is_latest": False})
-                    payload = indexer._build_payload(chunk, config.BRANCH, commit_sha)
-                    points.append(PointStruct(id=payload["point_id"], vector=vector, payload=payload))
-                if points:
-                    store_client.upsert_points(points)
-
-            if to_update_only_pos:
-                for chunk, translated in to_update_only_pos:
-                    olds = store_client.scroll_by_logical(chunk.logical_id, is_latest=True)
-                    if olds:
-                        store_client.set_payload([p.id for p in olds], {"lines": [translated.start_line, translated.end_line]})
+                store_client.upsert_batch([p["point_id"] for p in payloads], vectors, payloads)
 
             processed += 1
             registry.update_index_status(
@@ -516,8 +513,7 @@ def _generate_update_index_progress(request: Request, repo_id: str, stack_type_o
                 }
             ) + "\n"
 
-        state[repo_id] = head
-        save_state(config.STATE_FILE, state)
+        update_state(config.STATE_FILE, repo_id, head)
         registry.update_index_status(
             repo_id,
             last_indexed_commit=head,
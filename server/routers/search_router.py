@@ -1,12 +1,15 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 
 from server.config import Config
-from server.models.search import SearchRequest
-from server.services.git_aware_code_indexer import Retriever
+from server.models.search import SearchBatchRequest, SearchRequest
+from server.services.embedding_batcher import EmbeddingBatcher
+from server.services.git_aware_code_indexer import Embeddings, Retriever, VectorStore
 from server.services.repository_registry import RepositoryRegistry
 from server.services.state_manager import get_repo_path
 
@@ -21,38 +24,56 @@ def _registry(request: Request) -> RepositoryRegistry:
     return request.app.state.registry
 
 
-@router.post("/search", response_model=List[Dict[str, Any]])
-def search(request: Request, req: SearchRequest):
+def _batcher(request: Request) -> EmbeddingBatcher:
+    return request.app.state.embedding_batcher
+
+
+def _resolve_search_target(
+    request: Request,
+    req: Union[SearchRequest, SearchBatchRequest],
+) -> Tuple[str, Embeddings, VectorStore, Optional[Path], Optional[str]]:
+    """Resolve (embedding model, clients, repo path, stack type) for a search; blocking registry/Qdrant work."""
     config = _config(request)
     initializer = request.app.state.initializer
-    repo_path = None
     stack_type = req.stack_type or getattr(config, "STACK_TYPE", None)
+
+    if not req.repo_id:
+        emb_client = initializer.get_embeddings_client(config.EMB_MODEL)
+        store_client = initializer.get_vector_store(config.COLLECTION, config.EMB_MODEL)
+        return config.EMB_MODEL, emb_client, store_client, None, stack_type
+
+    defaults = {
+        "name": req.repo_id,
+        "collection_name": config.COLLECTION,
+        "embedding_model": config.EMB_MODEL,
+        "stack_type": getattr(config, "STACK_TYPE", None),
+    }
+    repo_entry = _registry(request).ensure_repository(req.repo_id, defaults)
+    if repo_entry.archived:
+        raise HTTPException(status_code=400, detail=f"Repository '{req.repo_id}' is archived")
+    stack_type = req.stack_type or repo_entry.stack_type or getattr(config, "STACK_TYPE", None)
+    emb_client, store_client = initializer.resolve_clients(
+        repo_entry.collection_name,
+        repo_entry.embedding_model,
+    )
+    repo_path = get_repo_path(config.REPOS_DIR, req.repo_id)
+    return repo_entry.embedding_model, emb_client, store_client, repo_path, stack_type
+
+
+@router.post("/search", response_model=List[Dict[str, Any]])
+async def search(request: Request, req: SearchRequest):
+    config = _config(request)
     screen_name = req.screen_name.lower() if req.screen_name else None
     tags = sorted({t for t in (req.tags or []) if t}) or None
 
     try:
-        if req.repo_id:
-            defaults = {
-                "name": req.repo_id,
-                "collection_name": config.COLLECTION,
-                "embedding_model": config.EMB_MODEL,
-                "stack_type": getattr(config, "STACK_TYPE", None),
-            }
-            repo_entry = _registry(request).ensure_repository(req.repo_id, defaults)
-            if repo_entry.archived:
-                raise HTTPException(status_code=400, detail=f"Repository '{req.repo_id}' is archived")
-            stack_type = req.stack_type or repo_entry.stack_type or getattr(config, "STACK_TYPE", None)
-            emb_client, store_client = initializer.resolve_clients(
-                repo_entry.collection_name,
-                repo_entry.embedding_model,
-            )
-            repo_path = get_repo_path(config.REPOS_DIR, req.repo_id)
-        else:
-            emb_client = initializer.get_embeddings_client(config.EMB_MODEL)
-            store_client = initializer.get_vector_store(config.COLLECTION, config.EMB_MODEL)
+        model, emb_client, store_client, repo_path, stack_type = await run_in_threadpool(
+            _resolve_search_target, request, req
+        )
+        query_vector = await _batcher(request).embed_one(model, req.query, use_cache=not req.no_cache)
 
         retriever = Retriever(store_client, emb_client, str(repo_path) if repo_path else None)
-        results = retriever.search(
+        results = await retriever.asearch(
             req.query,
             req.k,
             config.BRANCH,
@@ -61,9 +82,46 @@ def search(request: Request, req: SearchRequest):
             component_type=req.component_type,
             screen_name=screen_name,
             tags=tags,
+            logical_ids=req.logical_ids,
+            query_vector=query_vector,
+            ef=req.ef,
         )
         return results
     except HTTPException:
         raise
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
+
+
+@router.post("/search_batch", response_model=List[List[Dict[str, Any]]])
+async def search_batch(request: Request, req: SearchBatchRequest):
+    config = _config(request)
+    if not req.queries:
+        return []
+    screen_name = req.screen_name.lower() if req.screen_name else None
+    tags = sorted({t for t in (req.tags or []) if t}) or None
+
+    try:
+        model, emb_client, store_client, repo_path, stack_type = await run_in_threadpool(
+            _resolve_search_target, request, req
+        )
+        query_vectors = await _batcher(request).embed_many(model, req.queries, use_cache=not req.no_cache)
+
+        retriever = Retriever(store_client, emb_client, str(repo_path) if repo_path else None)
+        return await retriever.asearch_batch(
+            req.queries,
+            req.k,
+            config.BRANCH,
+            repo=req.repo_id,
+            stack_type=stack_type,
+            component_type=req.component_type,
+            screen_name=screen_name,
+            tags=tags,
+            logical_ids=req.logical_ids,
+            query_vectors=query_vectors,
+            ef=req.ef,
+        )
+    except HTTPException:
+        raise
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
@@ -9,6 +9,14 @@ from .edges import EdgePayload, EdgeType, build_edge, dedupe_edges, merge_edges,
 ANDROID_NS = "{http://schemas.android.com/apk/res/android}"
 APP_NS = "{http://schemas.android.com/apk/res-auto}"
 
+# Source-code edge heuristics, run against every Kotlin/Java/XML chunk.
+_LAYOUT_REF_RE = re.compile(r"R\.layout\.([A-Za-z0-9_]+)")
+_NAVIGATE_RE = re.compile(r"navigate\(\s*R\.id\.([A-Za-z0-9_]+)")
+_START_ACTIVITY_RE = re.compile(r"startActivity\([^)]*?([A-Za-z0-9_]+Activity)")
+_API_CALL_RE = re.compile(r"([A-Za-z0-9_]+(?:Api|Service))\.([A-Za-z0-9_]+)\(")
+_VIEWMODEL_DELEGATE_RE = re.compile(r"by\s+(?:activityViewModels|viewModels|hiltViewModels|hiltViewModel)\s*<\s*([A-Za-z0-9_]+)\s*>")
+_VIEWMODEL_PROVIDER_RE = re.compile(r"ViewModelProvider\([^)]*\)\s*\[\s*([A-Za-z0-9_]+)\s*::class")
+
 
 def _safe_parse_xml(src: str) -> Optional[ET.Element]:
     try:
@@ -232,28 +240,28 @@ class AndroidPayloadPlugin(PayloadPlugin):
         content = getattr(chunk, "content", "") or ""
         if content and (chunk.path.endswith(".kt") or chunk.path.endswith(".java") or kind in (None, "xml")):
             # Layout binding via R.layout.*
-            for match in re.findall(r"R\.layout\.([A-Za-z0-9_]+)", content):
+            for match in _LAYOUT_REF_RE.findall(content):
                 target = normalize_layout_target(match)
                 if target:
                     edges.append(build_edge(EdgeType.BINDS_LAYOUT, target))
             # NavController navigate calls
-            for match in re.findall(r"navigate\(\s*R\.id\.([A-Za-z0-9_]+)", content):
+            for match in _NAVIGATE_RE.findall(content):
                 target = normalize_id(match)
                 if target:
                     edges.append(build_edge(EdgeType.NAVIGATES_TO, target))
             # startActivity(Intent(..., SomeActivity::class.java))
-            for match in re.findall(r"startActivity\([^)]*?([A-Za-z0-9_]+Activity)", content):
+            for match in _START_ACTIVITY_RE.findall(content):
                 target = normalize_id(match)
                 if target:
                     edges.append(build_edge(EdgeType.NAVIGATES_TO, target))
             # Simple API call heuristic: serviceApi.method(…) or serviceService.method(…)
-            for service, method in re.findall(r"([A-Za-z0-9_]+(?:Api|Service))\.([A-Za-z0-9_]+)\(", content):
+            for service, method in _API_CALL_RE.findall(content):
                 target = f"{service}.{method}"
                 edges.append(build_edge(EdgeType.CALLS_API, target))
             # ViewModel usage heuristics (KTX delegates and ViewModelProvider)
-            for vm in re.findall(r"by\s+(?:activityViewModels|viewModels|hiltViewModels|hiltViewModel)\s*<\s*([A-Za-z0-9_]+)\s*>", content):
+            for vm in _VIEWMODEL_DELEGATE_RE.findall(content):
                 edges.append(build_edge(EdgeType.USES_VIEWMODEL, vm))
-            for vm in re.findall(r"ViewModelProvider\([^)]*\)\s*\[\s*([A-Za-z0-9_]+)\s*::class", content):
+            for vm in _VIEWMODEL_PROVIDER_RE.findall(content):
                 edges.append(build_edge(EdgeType.USES_VIEWMODEL, vm))
 
         if meta.get("edges"):
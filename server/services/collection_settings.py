@@ -0,0 +1,73 @@
+"""Qdrant collection settings shared by the indexer and script/rebuild_collections.py.
+
+Only needs `qdrant_client` models, so standalone tools can build collections the same way the server does
+without importing the indexer (OpenAI, tiktoken, tree-sitter). Knobs are read from the environment at import.
+"""
+
+import os
+from typing import Dict, Optional
+
+from qdrant_client.http.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    Datatype,
+    Distance,
+    HnswConfigDiff,
+    PayloadSchemaType,
+    QuantizationConfig,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    VectorParams,
+)
+
+# gRPC ships vectors as packed protobuf floats instead of JSON text; opt-in because it needs the gRPC port reachable.
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "0").lower() in {"1", "true", "yes"}
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+# HNSW graph build parameters for new collections; per-request `ef` trades recall for latency at search time.
+HNSW_M = max(4, int(os.getenv("HNSW_M", "16")))
+HNSW_EF_CONSTRUCT = max(4, int(os.getenv("HNSW_EF_CONSTRUCT", "200")))
+
+# Payload indexes created with new collections so filtered search and logical_id scrolls skip full scans.
+PAYLOAD_INDEX_FIELDS: Dict[str, PayloadSchemaType] = {
+    "repo": PayloadSchemaType.KEYWORD,
+    "branch": PayloadSchemaType.KEYWORD,
+    "logical_id": PayloadSchemaType.KEYWORD,
+    "path": PayloadSchemaType.KEYWORD,
+    "content_hash": PayloadSchemaType.KEYWORD,
+    "is_latest": PayloadSchemaType.BOOL,
+}
+
+
+def quantization_config(mode: str) -> Optional[QuantizationConfig]:
+    """Map a QUANT_MODE value (none | scalar (int8) | binary) to the quantization config for new collections."""
+    mode = mode.strip().lower()
+    if mode in ("", "none", "off"):
+        return None
+    if mode == "scalar":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    if mode == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+    raise ValueError(f"Unsupported QUANT_MODE '{mode}'; expected none, scalar or binary")
+
+
+def hnsw_config() -> HnswConfigDiff:
+    return HnswConfigDiff(m=HNSW_M, ef_construct=HNSW_EF_CONSTRUCT)
+
+
+def vector_params(dim: int, quant_mode: str, datatype: str) -> VectorParams:
+    """Build VectorParams for a new collection; originals go on disk when a quantized copy serves search.
+
+    `datatype` stores the originals as float32 or float16 (half the RAM/disk per vector).
+    """
+    datatype = datatype.strip().lower()
+    if datatype not in ("float32", "float16"):
+        raise ValueError(f"Unsupported VECTOR_DATATYPE '{datatype}'; expected float32 or float16")
+    return VectorParams(
+        size=dim,
+        distance=Distance.COSINE,
+        on_disk=quantization_config(quant_mode) is not None,
+        datatype=Datatype.FLOAT16 if datatype == "float16" else Datatype.FLOAT32,
+    )
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+
+from server.services.embedding_cache import QueryEmbeddingCache
+from server.services.initializers import Initializer
+
+logger = logging.getLogger(__name__)
+
+_QueueItem = Tuple[str, str, "asyncio.Future[List[float]]"]
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent query embeddings into shared TEI requests.
+
+    Callers await ``embed_one``/``embed_many``; a background task drains the queue for up to
+    ``max_wait_ms`` (or ``max_batch`` items), groups the pending texts by embedding model and
+    resolves each caller's future from a single ``Embeddings.aembed`` call per model.
+    """
+
+    def __init__(
+        self,
+        initializer: Initializer,
+        max_batch: int = 64,
+        max_wait_ms: float = 5.0,
+        cache: Optional[QueryEmbeddingCache] = None,
+    ):
+        self.initializer = initializer
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.cache = cache
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional["asyncio.Queue[_QueueItem]"] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._inflight: Set[asyncio.Task] = set()
+
+    async def embed_one(self, model: str, text: str, use_cache: bool = True) -> List[float]:
+        return (await self.embed_many(model, [text], use_cache=use_cache))[0]
+
+    async def embed_many(self, model: str, texts: List[str], use_cache: bool = True) -> List[List[float]]:
+        if not texts:
+            return []
+        cache = self.cache if use_cache else None
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        # Cache hits resolve immediately; repeated misses are embedded once and fanned back out.
+        misses: Dict[str, List[int]] = {}
+        for idx, text in enumerate(texts):
+            key = QueryEmbeddingCache.normalize(text)
+            cached = cache.get(model, key) if cache is not None else None
+            if cached is not None:
+                results[idx] = cached
+            else:
+                misses.setdefault(key, []).append(idx)
+
+        if misses:
+            queue = self._ensure_worker()
+            loop = asyncio.get_running_loop()
+            futures = []
+            for key in misses:
+                future: "asyncio.Future[List[float]]" = loop.create_future()
+                queue.put_nowait((model, key, future))
+                futures.append(future)
+            vectors = await asyncio.gather(*futures)
+            for (key, indices), vector in zip(misses.items(), vectors):
+                if cache is not None:
+                    cache.put(model, key, vector)
+                for idx in indices:
+                    results[idx] = vector
+        return results  # type: ignore[return-value]
+
+    async def aclose(self) -> None:
+        tasks = [t for t in (self._worker, *self._inflight) if t is not None and not t.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._worker = None
+        self._queue = None
+        self._loop = None
+        self._inflight.clear()
+
+    def _ensure_worker(self) -> "asyncio.Queue[_QueueItem]":
+        loop = asyncio.get_running_loop()
+        # Restart when the previous worker died or belonged to another loop (e.g. TestClient portals).
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._inflight = set()
+            self._worker = loop.create_task(self._run(self._queue))
+        return self._queue
+
+    async def _run(self, queue: "asyncio.Queue[_QueueItem]") -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(pending) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    pending.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            while len(pending) < self.max_batch and not queue.empty():
+                pending.append(queue.get_nowait())
+            task = loop.create_task(self._flush(pending))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _flush(self, pending: List[_QueueItem]) -> None:
+        by_model: Dict[str, List[Tuple[str, "asyncio.Future[List[float]]"]]] = {}
+        for model, text, future in pending:
+            if not future.done():
+                by_model.setdefault(model, []).append((text, future))
+
+        for model, items in by_model.items():
+            texts = [text for text, _ in items]
+            try:
+                client = self.initializer.get_embeddings_client(model)
+                vectors = await client.aembed(texts)
+                if len(vectors) != len(texts):
+                    raise RuntimeError(f"Embedding backend returned {len(vectors)} vectors for {len(texts)} inputs")
+            except Exception as exc:
+                logger.error("Batched embedding failed for %d queries (model=%s): %s", len(texts), model, exc)
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            logger.debug("Embedded %d coalesced queries for model %s", len(texts), model)
+            for (_, future), vector in zip(items, vectors):
+                if not future.done():
+                    future.set_result(vector)
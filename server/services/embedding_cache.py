@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+_CacheKey = Tuple[str, str]
+
+
+class QueryEmbeddingCache:
+    """Bounded LRU of query vectors with a TTL, keyed by (embedding model, stripped query text).
+
+    Vectors are kept as float32 arrays (~1 KB per 256-dim entry). The cache is only touched from the
+    event loop, so it does not take a lock.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl_s: float = 3600.0, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = max(0, maxsize)
+        self.ttl_s = ttl_s
+        self._clock = clock
+        self._entries: "OrderedDict[_CacheKey, Tuple[float, np.ndarray]]" = OrderedDict()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return text.strip()
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        key = (model, self.normalize(text))
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, vector = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return vector.tolist()
+
+    def put(self, model: str, text: str, vector: List[float]) -> None:
+        if self.maxsize == 0:
+            return
+        key = (model, self.normalize(text))
+        self._entries[key] = (self._clock() + self.ttl_s, np.asarray(vector, dtype=np.float32))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,21 +1,47 @@
 
+import asyncio
+import fcntl
 import os
-import io
 import re
 import ast
-import json
+import bisect
+import codecs
+import functools
 import hashlib
+import itertools
 import subprocess
 import math
+import tempfile
+import multiprocessing
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import List, Tuple, Optional, Dict, Any, Protocol, TYPE_CHECKING, Sequence
+from typing import List, Tuple, Optional, Dict, Any, Protocol, TYPE_CHECKING, Sequence, Set, Union
 import uuid
-from openai import OpenAI
+import weakref
+from collections import OrderedDict
+import httpx
+import orjson
+from openai import APIStatusError, AsyncOpenAI, OpenAI
 import tiktoken
 
-from qdrant_client import QdrantClient
-from qdrant_client.http.models import PointStruct, Filter, FieldCondition, MatchAny, MatchValue
-import requests
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.http.models import (
+    Batch,
+    FieldCondition,
+    Filter,
+    MatchAny,
+    MatchValue,
+    OptimizersConfigDiff,
+    PointStruct,
+    QuantizationSearchParams,
+    SearchParams,
+    SetPayload,
+    SetPayloadOperation,
+    SearchRequest as QdrantSearchRequest,
+)
 import sys, logging
 from dotenv import load_dotenv
 # 강제로 stdout 플러시
@@ -45,7 +71,25 @@ MAX_CONTENT_CHARS = max(256, int(CHUNK_TOKENS * CHUNK_TOKEN_FRACTION * CHARS_PER
 
 # Embedding request safety limits.
 EMBED_CTX_TOKENS = int(os.getenv("EMBED_CTX_TOKENS", "512"))
-EMBEDDING_BATCH_SIZE = max(1, int(os.getenv("EMBEDDING_BATCH_SIZE", "4")))
+# Per-request limits: TEI pads/batches server-side, so one request should carry many chunks, bounded by the
+# backend's max client batch size and max batch tokens (see docker-compose.embedding.yml).
+EMBEDDING_BATCH_SIZE = max(1, int(os.getenv("EMBEDDING_BATCH_SIZE", "32")))
+EMBED_BATCH_TOKENS = max(EMBED_CTX_TOKENS, int(os.getenv("EMBED_BATCH_TOKENS", "16384")))
+# Connection pool for the embedding backend; reused across requests for keep-alive.
+EMB_MAX_CONNECTIONS = max(1, int(os.getenv("EMB_MAX_CONNECTIONS", "64")))
+EMB_MAX_KEEPALIVE = max(1, int(os.getenv("EMB_MAX_KEEPALIVE", "32")))
+# Wire format for TEI embeddings: base64 (packed float32, decoded by the SDK via numpy) | float (JSON arrays).
+EMB_WIRE_FORMAT = os.getenv("EMB_WIRE_FORMAT", "base64").strip().lower()
+# In-flight embedding requests per embed call; TEI queues them (MAX_CONCURRENT_REQUESTS) and keeps the GPU fed.
+EMB_CONCURRENCY = max(1, int(os.getenv("EMB_CONCURRENCY", "4")))
+
+# Optional HTTP/2 support for the async embedding client (httpx[http2]).
+_HTTP2_AVAILABLE = False
+try:
+    import h2  # noqa: F401
+    _HTTP2_AVAILABLE = True
+except Exception:
+    _HTTP2_AVAILABLE = False
 
 # Optional Tree-sitter
 _TS_AVAILABLE = False
@@ -56,11 +100,60 @@ try:
 except Exception:
     _TS_AVAILABLE = False
 
+# Worker processes for chunking files during a full index; 0/1 chunks serially in the calling thread.
+CHUNK_WORKERS = max(0, int(os.getenv("CHUNK_WORKERS", "0")))
+# Chunks embedded per step of a full index; the previous step's upsert runs while the next one embeds.
+INDEX_PIPELINE_WINDOW = max(1, int(os.getenv("INDEX_PIPELINE_WINDOW", "512")))
+# Threads reading search-hit files when a result set spans several files.
+HIT_READ_WORKERS = max(1, int(os.getenv("HIT_READ_WORKERS", "8")))
+
+# Collection settings shared with script/rebuild_collections.py; imported after load_dotenv() so .env applies.
+from server.services.collection_settings import (  # noqa: E402
+    PAYLOAD_INDEX_FIELDS,
+    QDRANT_GRPC_PORT,
+    QDRANT_PREFER_GRPC,
+    hnsw_config,
+    quantization_config,
+    vector_params,
+)
+
 # Qdrant client knobs
 QDRANT_UPSERT_BATCH = max(1, int(os.getenv("QDRANT_UPSERT_BATCH", "128")))
 QDRANT_TIMEOUT = float(os.getenv("QDRANT_TIMEOUT", "30"))
+# Concurrent upsert streams when one call spans several QDRANT_UPSERT_BATCH batches.
+QDRANT_UPLOAD_PARALLEL = max(1, int(os.getenv("QDRANT_UPLOAD_PARALLEL", "2")))
+# HNSW indexing threshold (KB) restored after a bulk load; also used when the collection reports 0/None.
+QDRANT_INDEXING_THRESHOLD = max(1, int(os.getenv("QDRANT_INDEXING_THRESHOLD", "20000")))
+# Directory for the per-collection lock files that coordinate bulk loads across server workers on one host.
+BULK_LOAD_LOCK_DIR = os.getenv("BULK_LOAD_LOCK_DIR", tempfile.gettempdir())
+# Search-time oversampling of quantized candidates before rescoring with the original vectors.
+QUANT_OVERSAMPLING = float(os.getenv("QUANT_OVERSAMPLING", "2.0"))
+
+
+def create_payload_indexes(client: QdrantClient, collection: str, existing: Sequence[str] = ()) -> None:
+    """Create the filter indexes missing from `existing`; safe to repeat and to race with another worker."""
+    for field_name, field_schema in PAYLOAD_INDEX_FIELDS.items():
+        if field_name in existing:
+            continue
+        try:
+            client.create_payload_index(
+                collection_name=collection,
+                field_name=field_name,
+                field_schema=field_schema,
+            )
+        except Exception as exc:
+            logger.warning("Could not create payload index %s on %s: %s", field_name, collection, exc)
+
 
-def _is_probably_binary(data: bytes, sample_size: int = 8000, control_threshold: float = 0.3) -> bool:
+_BINARY_SNIFF_BYTES = 8000
+# Decoded blobs kept per (repo, commit sha, path); a commit's files are immutable, so entries never go stale.
+# Sequential incremental runs re-read the previous head as the next base, which this turns into hits.
+GIT_BLOB_CACHE_SIZE = max(0, int(os.getenv("GIT_BLOB_CACHE_SIZE", "512")))
+_FULL_SHA_RE = re.compile(r"[0-9a-f]{40}|[0-9a-f]{64}")
+_CONTROL_BYTES = bytes(b for b in range(32) if b not in (9, 10, 13))
+
+
+def _is_probably_binary(data: bytes, sample_size: int = _BINARY_SNIFF_BYTES, control_threshold: float = 0.3) -> bool:
     """
     Lightweight binary detector: flags content with NUL bytes or a high ratio of
     control characters. Keeps UTF-8 text (including non-ASCII) from being
@@ -71,15 +164,15 @@ def _is_probably_binary(data: bytes, sample_size: int = 8000, control_threshold:
     if b"\x00" in data:
         return True
     sample = data[:sample_size]
-    allowed_ctrl = {9, 10, 13}  # tab, newline, carriage return
-    control_bytes = sum(1 for b in sample if b < 32 and b not in allowed_ctrl)
+    # Count control bytes (except tab/newline/CR) in C via translate instead of a per-byte Python loop.
+    control_bytes = len(sample) - len(sample.translate(None, _CONTROL_BYTES))
     return (control_bytes / max(1, len(sample))) > control_threshold
 
 
 def _normalize_vector(vec: Sequence[Any]) -> List[float]:
     """Coerce embedding output to a plain list of floats; scrub NaN/inf to keep Qdrant happy."""
     try:
-        flat = list(vec)
+        flat = vec if isinstance(vec, list) else list(vec)
     except Exception as exc:
         raise ValueError("Embedding vector is not iterable") from exc
     if not flat:
@@ -87,9 +180,12 @@ def _normalize_vector(vec: Sequence[Any]) -> List[float]:
     if isinstance(flat[0], (list, tuple)):
         raise ValueError("Embedding vector is nested; expected a 1-D list")
     try:
-        floats = [float(v) for v in flat]
+        floats = list(map(float, flat))
     except Exception as exc:
         raise ValueError("Embedding vector contains non-numeric values") from exc
+    # Runs on every embedded and upserted vector: the all-finite common case stays in C with a single list.
+    if all(map(math.isfinite, floats)):
+        return floats
     non_finite = 0
     cleaned: List[float] = []
     for v in floats:
@@ -106,6 +202,26 @@ def _normalize_vector(vec: Sequence[Any]) -> List[float]:
 def sha256(data: bytes) -> str:
     return hashlib.sha256(data).hexdigest()
 
+
+@functools.lru_cache(maxsize=64)
+def _sig_prefix(node_type: str) -> "hashlib._Hash":
+    h = hashlib.sha256(node_type.encode())
+    h.update(b":")
+    return h
+
+
+def _sig_hash(node_type: str, name: str) -> str:
+    """sha256(f"{node_type}:{name}") continued from a per-node-type prefix state instead of hashed from scratch."""
+    h = _sig_prefix(node_type).copy()
+    h.update(name.encode())
+    return h.hexdigest()
+
+
+@functools.lru_cache(maxsize=4096)
+def _range_sig_hash(symbol: str) -> str:
+    # Generic "range:NNNN-MMMM" symbols repeat in every file, so their hashes are shared.
+    return sha256(symbol.encode())
+
 @dataclass
 class Range:
     start_line: int
@@ -172,17 +288,80 @@ class Embeddings:
         self.model = model
         self.api_key = api_key
         self.token_budget = EMBED_CTX_TOKENS
+        self.batch_token_budget = EMBED_BATCH_TOKENS
         self.batch_size = EMBEDDING_BATCH_SIZE
+        self.concurrency = EMB_CONCURRENCY
         try:
             self.encoding = tiktoken.get_encoding("cl100k_base")
         except Exception as e:
             logger.warning("Failed to load tiktoken encoding; falling back to naive length estimates: %s", e)
             self.encoding = None
+        # One pooled keep-alive connection set per client instead of the SDK's implicit defaults.
+        self._http = httpx.Client(timeout=None, limits=_emb_http_limits())
         self.client = OpenAI(
             base_url=self.base_url,
             api_key=self.api_key if self.api_key else "unused",  # TEI may not require it; set to dummy if empty
-            timeout=None
+            timeout=None,
+            http_client=self._http,
         )
+        self._async_client: Optional[AsyncOpenAI] = None
+        self._async_http: Optional[httpx.AsyncClient] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Leaving encoding_format unset makes the SDK request base64 and np.frombuffer-decode it itself;
+        # passing "base64" explicitly would hand back undecoded strings, so only the JSON fallback is explicit.
+        self._create_kwargs: Dict[str, Any] = {} if EMB_WIRE_FORMAT == "base64" else {"encoding_format": "float"}
+
+    def _count_tokens(self, text: str) -> int:
+        if self.encoding:
+            return len(self.encoding.encode(text))
+        # Fallback heuristic: assume 4 chars per token for safety.
+        return int(len(text) / 4) + 1
+
+    def _truncate_to_budget(self, text: str) -> str:
+        if not self.encoding or self._count_tokens(text) <= self.token_budget:
+            return text
+        tokens = self.encoding.encode(text)
+        truncated = self.encoding.decode(tokens[: self.token_budget])
+        logger.warning("Truncated input from %d to %d tokens to fit embedding context", len(tokens), self.token_budget)
+        return truncated
+
+    def _plan_batches(self, texts: List[str]) -> Tuple[List[List[str]], List[int]]:
+        """Truncate texts to the context budget and group them into request-sized batches.
+
+        Texts are batched shortest-first so each TEI request pads to a similar length; the returned
+        order lists the input index of every text in batch order, for scattering results back.
+        """
+        truncated = [self._truncate_to_budget(t) for t in texts]
+        token_counts = [self._count_tokens(t) for t in truncated]
+        order = sorted(range(len(truncated)), key=token_counts.__getitem__)
+
+        batches: List[List[str]] = []
+        current_batch: List[str] = []
+        current_tokens = 0
+
+        for idx in order:
+            text, text_tokens = truncated[idx], token_counts[idx]
+            # Flush if adding this text would exceed the per-request token budget or batch size.
+            if current_batch and (
+                len(current_batch) >= self.batch_size or current_tokens + text_tokens > self.batch_token_budget
+            ):
+                batches.append(current_batch)
+                current_batch, current_tokens = [], 0
+            # If a single text still exceeds the budget (should not after truncation), force single-item batch.
+            if text_tokens > self.token_budget:
+                logger.warning("Single text exceeds token budget even after truncation; sending alone")
+                # Flush first: batches must stay in `order` for the results to scatter back correctly.
+                if current_batch:
+                    batches.append(current_batch)
+                    current_batch, current_tokens = [], 0
+                batches.append([text])
+                continue
+            current_batch.append(text)
+            current_tokens += text_tokens
+
+        if current_batch:
+            batches.append(current_batch)
+        return batches, order
 
     def embed(self, texts: List[str]) -> List[List[float]]:
         """
@@ -193,106 +372,409 @@ class Embeddings:
         if not texts:
             return []
 
-        def _count_tokens(text: str) -> int:
-            if self.encoding:
-                return len(self.encoding.encode(text))
-            # Fallback heuristic: assume 4 chars per token for safety.
-            return int(len(text) / 4) + 1
+        unique, inverse = _dedupe_texts(texts)
+        batches, order = self._plan_batches(unique)
+        started = time.perf_counter()
+        streams = min(self.concurrency, len(batches))
+        if streams <= 1:
+            results = [self._send_batch(batch) for batch in batches]
+        else:
+            # Overlap request round trips so the backend never idles between batches; map() keeps batch order.
+            with ThreadPoolExecutor(max_workers=streams, thread_name_prefix="embed") as pool:
+                results = list(pool.map(self._send_batch, batches))
+        sorted_embeddings = [vector for vectors in results for vector in vectors]
+        _log_throughput(len(unique), len(batches), started)
+        return _scatter(sorted_embeddings, order, inverse)
+
+    def _send_batch(self, batch: List[str]) -> List[List[float]]:
+        try:
+            response = self.client.embeddings.create(input=batch, model=self.model, **self._create_kwargs)
+        except APIStatusError as e:
+            if e.status_code == 413 and len(batch) > 1:
+                mid = len(batch) // 2
+                logger.warning("Embedding batch of %d texts rejected as too large; retrying in halves", len(batch))
+                return self._send_batch(batch[:mid]) + self._send_batch(batch[mid:])
+            logger.error("Error during embedding request for batch of %d texts: %s", len(batch), e)
+            raise
+        except Exception as e:  # Catch OpenAI SDK errors (e.g., APIError, Timeout)
+            logger.error("Error during embedding request for batch of %d texts: %s", len(batch), e)
+            raise
+        return [_normalize_vector(item.embedding) for item in response.data]
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        """Async variant of `embed` on a long-lived pooled client (HTTP/2 when `h2` is installed)."""
+        if not texts:
+            return []
 
-        def _truncate_to_budget(text: str) -> str:
-            if not self.encoding or _count_tokens(text) <= self.token_budget:
-                return text
-            tokens = self.encoding.encode(text)
-            truncated = self.encoding.decode(tokens[: self.token_budget])
-            logger.warning("Truncated input from %d to %d tokens to fit embedding context", len(tokens), self.token_budget)
-            return truncated
+        client = self._get_async_client()
+        unique, inverse = _dedupe_texts(texts)
+        batches, order = self._plan_batches(unique)
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.concurrency)
 
-        prepared = []
-        for t in texts:
-            cleaned = _truncate_to_budget(t)
-            prepared.append(cleaned)
+        async def send(batch: List[str]) -> List[List[float]]:
+            async with semaphore:
+                return await self._asend_batch(client, batch)
 
-        all_embeddings: List[List[float]] = []
-        current_batch: List[str] = []
-        current_tokens = 0
+        results = await asyncio.gather(*(send(batch) for batch in batches))
+        sorted_embeddings = [vector for vectors in results for vector in vectors]
+        _log_throughput(len(unique), len(batches), started)
+        return _scatter(sorted_embeddings, order, inverse)
 
-        def _flush_batch():
-            nonlocal current_batch, current_tokens, all_embeddings
-            if not current_batch:
-                return
-            try:
-                response = self.client.embeddings.create(
-                    input=current_batch,
-                    model=self.model
-                )
-                batch_embeddings = [_normalize_vector(item.embedding) for item in response.data]
-                all_embeddings.extend(batch_embeddings)
-            except Exception as e:  # Catch OpenAI SDK errors (e.g., APIError, Timeout)
-                logger.error("Error during embedding request for batch of %d texts: %s", len(current_batch), e)
-                raise
-            finally:
-                current_batch = []
-                current_tokens = 0
-
-        for text in prepared:
-            text_tokens = _count_tokens(text)
-            # Flush if adding this text would exceed the budget or batch size.
-            if current_batch and (len(current_batch) >= self.batch_size or current_tokens + text_tokens > self.token_budget):
-                _flush_batch()
-            # If a single text still exceeds the budget (should not after truncation), force single-item batch.
-            if text_tokens > self.token_budget:
-                logger.warning("Single text exceeds token budget even after truncation; sending alone")
-                current_batch = [text]
-                current_tokens = text_tokens
-                _flush_batch()
-                continue
-            current_batch.append(text)
-            current_tokens += text_tokens
+    async def _asend_batch(self, client: AsyncOpenAI, batch: List[str]) -> List[List[float]]:
+        try:
+            response = await client.embeddings.create(input=batch, model=self.model, **self._create_kwargs)
+        except APIStatusError as e:
+            if e.status_code == 413 and len(batch) > 1:
+                mid = len(batch) // 2
+                logger.warning("Embedding batch of %d texts rejected as too large; retrying in halves", len(batch))
+                return await self._asend_batch(client, batch[:mid]) + await self._asend_batch(client, batch[mid:])
+            logger.error("Error during embedding request for batch of %d texts: %s", len(batch), e)
+            raise
+        except Exception as e:
+            logger.error("Error during embedding request for batch of %d texts: %s", len(batch), e)
+            raise
+        return [_normalize_vector(item.embedding) for item in response.data]
+
+    def _get_async_client(self) -> AsyncOpenAI:
+        loop = asyncio.get_running_loop()
+        # Pooled connections belong to the loop that opened them; rebuild if we are now on another loop.
+        if self._async_client is None or self._async_loop is not loop:
+            self._async_http = httpx.AsyncClient(timeout=None, limits=_emb_http_limits(), http2=_HTTP2_AVAILABLE)
+            self._async_client = AsyncOpenAI(
+                base_url=self.base_url,
+                api_key=self.api_key if self.api_key else "unused",
+                timeout=None,
+                http_client=self._async_http,
+            )
+            self._async_loop = loop
+        return self._async_client
+
+    def close(self) -> None:
+        self._http.close()
+
+    async def aclose(self) -> None:
+        if self._async_http is not None and self._async_loop is asyncio.get_running_loop():
+            await self._async_http.aclose()
+        self._async_client = None
+        self._async_http = None
+        self._async_loop = None
 
-        _flush_batch()
 
-        return all_embeddings
+def _dedupe_texts(texts: List[str]) -> Tuple[List[str], List[int]]:
+    """Order-preserving dedup: returns the unique texts and, per input, the index of its unique entry."""
+    index: Dict[str, int] = {}
+    inverse = [index.setdefault(t, len(index)) for t in texts]
+    return list(index), inverse
+
+
+def _log_throughput(count: int, num_requests: int, started: float) -> None:
+    elapsed = time.perf_counter() - started
+    logger.debug(
+        "Embedded %d texts in %d requests (%.1f texts/s)", count, num_requests, count / elapsed if elapsed > 0 else 0.0
+    )
+
+
+def _scatter(sorted_vectors: List[List[float]], order: List[int], inverse: List[int]) -> List[List[float]]:
+    """Undo the length sort (`order`) and the dedup (`inverse`) so vectors line up with the caller's texts."""
+    unique_vectors: List[List[float]] = [[] for _ in order]
+    for pos, idx in enumerate(order):
+        unique_vectors[idx] = sorted_vectors[pos]
+    return [unique_vectors[i] for i in inverse]
+
+
+def _emb_http_limits() -> httpx.Limits:
+    return httpx.Limits(max_connections=EMB_MAX_CONNECTIONS, max_keepalive_connections=EMB_MAX_KEEPALIVE)
 
 # ----------------------- qdrant store -----------------------
+def _bulk_load_lock_paths(url: Optional[str], collection: str) -> Tuple[str, str]:
+    """(mutex, active) lock files for one collection, shared by every worker process on this host.
+
+    Each running bulk load holds a shared flock on `active`, which the kernel drops if the worker dies, and
+    `active` records the threshold to restore; `mutex` serializes starting/finishing a load.
+    """
+    key = hashlib.sha1(f"{url}|{collection}".encode("utf-8")).hexdigest()[:16]
+    base = os.path.join(BULK_LOAD_LOCK_DIR, f"qdrant-bulk-load-{key}")
+    return f"{base}.lock", f"{base}.active"
+
+
+@contextmanager
+def _flocked(path: str):
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def _no_other_bulk_load(active_fd: int) -> bool:
+    """Take `active` exclusively; that only succeeds when no other load (thread or worker) holds it shared."""
+    try:
+        fcntl.flock(active_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+
+def _restore_indexing(client: QdrantClient, collection: str, active_fd: int) -> None:
+    raw = os.pread(active_fd, 32, 0).strip()
+    threshold = int(raw) if raw.isdigit() and int(raw) > 0 else QDRANT_INDEXING_THRESHOLD
+    try:
+        client.update_collection(
+            collection_name=collection,
+            optimizer_config=OptimizersConfigDiff(indexing_threshold=threshold),
+        )
+    except Exception as exc:
+        logger.error("Failed to restore indexing_threshold=%s on %s: %s", threshold, collection, exc)
+
+
+def restore_stalled_indexing(client: QdrantClient, url: Optional[str], collection: str) -> bool:
+    """Re-enable HNSW indexing left paused (threshold 0) by a bulk load whose worker died.
+
+    Does nothing while any worker on this host is still bulk loading the collection; returns whether the
+    threshold was restored.
+    """
+    mutex, active_path = _bulk_load_lock_paths(url, collection)
+    with _flocked(mutex):
+        active = os.open(active_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if not _no_other_bulk_load(active):
+                return False
+            _restore_indexing(client, collection, active)
+            return True
+        finally:
+            os.close(active)
+
+
 class VectorStore:
-    def __init__(self, collection: str, url: str, api_key: Optional[str] = None, dim: Optional[int] = None):
+    def __init__(
+        self,
+        collection: str,
+        url: str,
+        api_key: Optional[str] = None,
+        dim: Optional[int] = None,
+        quant_mode: str = "none",
+        vector_datatype: str = "float32",
+        client: Optional[QdrantClient] = None,
+    ):
         self.collection = collection
-        self.client = QdrantClient(url=url, api_key=api_key, timeout=QDRANT_TIMEOUT)
+        self.url = url
+        self.api_key = api_key
+        # Callers managing several collections pass one shared client so every store reuses the same pool.
+        self.client = client if client is not None else QdrantClient(
+            url=url, api_key=api_key, timeout=QDRANT_TIMEOUT, prefer_grpc=QDRANT_PREFER_GRPC, grpc_port=QDRANT_GRPC_PORT
+        )
+        self._aclient: Optional[AsyncQdrantClient] = None
+        self._aclient_loop: Optional[asyncio.AbstractEventLoop] = None
         self.is_new = False
+        self.search_params = SearchParams(
+            quantization=QuantizationSearchParams(rescore=True, oversampling=QUANT_OVERSAMPLING)
+        )
         try:
-            self.client.get_collection(collection_name=collection)
+            info = self.client.get_collection(collection_name=collection)
         except Exception:
             if dim is None:
                 raise RuntimeError("Create collection manually or provide dim on first run")
-            from qdrant_client.http.models import Distance, VectorParams
             self.client.recreate_collection(
                 collection_name=collection,
-                vectors_config=VectorParams(size=dim, distance=Distance.COSINE),
+                vectors_config=vector_params(dim, quant_mode, vector_datatype),
+                quantization_config=quantization_config(quant_mode),
+                hnsw_config=hnsw_config(),
+                on_disk_payload=True,
             )
+            create_payload_indexes(self.client, collection)
             self.is_new = True
+        else:
+            create_payload_indexes(self.client, collection, existing=list(info.payload_schema or {}))
 
     def upsert(self, point_id: str, vector: List[float], payload: Dict[str, Any]):
         self.upsert_points([PointStruct(id=point_id, vector=vector, payload=payload)])
 
     def upsert_points(self, points: List[PointStruct], batch_size: int = QDRANT_UPSERT_BATCH):
+        self.upsert_batch(
+            [p.id for p in points],
+            [getattr(p, "vector", []) for p in points],
+            [p.payload for p in points],
+            batch_size=batch_size,
+        )
+
+    def upsert_batch(
+        self,
+        ids: List[Any],
+        vectors: Sequence[Sequence[float]],
+        payloads: List[Dict[str, Any]],
+        batch_size: int = QDRANT_UPSERT_BATCH,
+    ):
+        """Upsert parallel id/vector/payload columns as Qdrant `Batch`es, without a PointStruct per point."""
         batch = max(1, batch_size)
-        for i in range(0, len(points), batch):
-            normalized_batch = [
-                PointStruct(
-                    id=p.id,
-                    vector=_normalize_vector(getattr(p, "vector", [])),
-                    payload=p.payload,
-                )
-                for p in points[i:i + batch]
-            ]
-            self.client.upsert(collection_name=self.collection, points=normalized_batch)
+        batches = [
+            Batch(
+                ids=ids[i:i + batch],
+                vectors=[_normalize_vector(v) for v in vectors[i:i + batch]],
+                payloads=payloads[i:i + batch],
+            )
+            for i in range(0, len(ids), batch)
+        ]
+        streams = min(QDRANT_UPLOAD_PARALLEL, len(batches))
+        if streams <= 1:
+            for columns in batches:
+                self.client.upsert(collection_name=self.collection, points=columns)
+            return
+        # A couple of in-flight batches keeps Qdrant busy during our RTT; more tends to saturate a single node.
+        with ThreadPoolExecutor(max_workers=streams, thread_name_prefix="qdrant-upsert") as pool:
+            for _ in pool.map(lambda b: self.client.upsert(collection_name=self.collection, points=b), batches):
+                pass
+
+    @contextmanager
+    def bulk_load(self):
+        """Defer HNSW building while a full index streams points in, then restore the collection's threshold.
+
+        Indexing every segment as it fills makes Qdrant rebuild graphs the optimizer later merges anyway;
+        with indexing_threshold=0 it only stores vectors and builds the graph once at the end. Overlapping
+        bulk loads on one collection from any thread or worker process on this host share the pause through
+        lock files in BULK_LOAD_LOCK_DIR: the first records the threshold it found, and only the last one
+        to finish restores it. If no real value was ever recorded, QDRANT_INDEXING_THRESHOLD is restored.
+        A load whose worker is killed leaves indexing paused until the next load ends or
+        `restore_stalled_indexing` runs at startup. Workers on other hosts are not coordinated.
+        """
+        mutex, active_path = _bulk_load_lock_paths(self.url, self.collection)
+        active = os.open(active_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            with _flocked(mutex):
+                fcntl.flock(active, fcntl.LOCK_SH)
+                try:
+                    info = self.client.get_collection(collection_name=self.collection)
+                    current = info.config.optimizer_config.indexing_threshold
+                    # A 0 here means another load already paused it; keep the value the first one recorded.
+                    if current:
+                        os.ftruncate(active, 0)
+                        os.pwrite(active, str(current).encode("ascii"), 0)
+                        self._set_indexing_threshold(0)
+                except Exception as exc:
+                    logger.warning("Could not pause indexing on %s for bulk load: %s", self.collection, exc)
+            try:
+                yield
+            finally:
+                with _flocked(mutex):
+                    if _no_other_bulk_load(active):
+                        _restore_indexing(self.client, self.collection, active)
+        finally:
+            os.close(active)
+
+    def _set_indexing_threshold(self, threshold: int) -> None:
+        self.client.update_collection(
+            collection_name=self.collection,
+            optimizer_config=OptimizersConfigDiff(indexing_threshold=threshold),
+        )
 
     def set_payload(self, point_ids: List[str], payload: Dict[str, Any]):
         self.client.set_payload(collection_name=self.collection, payload=payload, points=point_ids)
 
-    def search(self, query_vector: List[float], k: int = 5, filt: Optional[Filter] = None):
+    def set_payloads(self, updates: Sequence[Tuple[List[Any], Dict[str, Any]]]):
+        """Apply several (point_ids, payload) updates in one batch_update_points round trip.
+
+        Updates carrying an identical payload are merged into a single operation over their combined ids.
+        """
+        grouped: Dict[bytes, Tuple[List[Any], Dict[str, Any]]] = {}
+        for point_ids, payload in updates:
+            if point_ids:
+                key = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS, default=str)
+                grouped.setdefault(key, ([], payload))[0].extend(point_ids)
+        operations = [
+            SetPayloadOperation(set_payload=SetPayload(payload=payload, points=point_ids))
+            for point_ids, payload in grouped.values()
+        ]
+        if operations:
+            self.client.batch_update_points(collection_name=self.collection, update_operations=operations)
+
+    def search(self, query_vector: List[float], k: int = 5, filt: Optional[Filter] = None, ef: Optional[int] = None):
         normalized = _normalize_vector(query_vector)
-        return self.client.search(collection_name=self.collection, query_vector=normalized, limit=k, query_filter=filt)
+        # Rescoring with oversampling keeps recall on quantized collections; Qdrant ignores it otherwise.
+        return self.client.search(
+            collection_name=self.collection,
+            query_vector=normalized,
+            limit=k,
+            query_filter=filt,
+            search_params=self._search_params(ef),
+        )
+
+    def search_batch(
+        self,
+        query_vectors: Sequence[Sequence[float]],
+        k: int = 5,
+        filt: Optional[Filter] = None,
+        ef: Optional[int] = None,
+    ):
+        requests_ = [
+            QdrantSearchRequest(
+                vector=_normalize_vector(vec),
+                limit=k,
+                filter=filt,
+                with_payload=True,
+                params=self._search_params(ef),
+            )
+            for vec in query_vectors
+        ]
+        if not requests_:
+            return []
+        return self.client.search_batch(collection_name=self.collection, requests=requests_)
+
+    async def asearch(self, query_vector: List[float], k: int = 5, filt: Optional[Filter] = None, ef: Optional[int] = None):
+        """Async `search` so API handlers do not hold the event loop during the Qdrant round trip."""
+        return await self._get_aclient().search(
+            collection_name=self.collection,
+            query_vector=_normalize_vector(query_vector),
+            limit=k,
+            query_filter=filt,
+            search_params=self._search_params(ef),
+        )
+
+    async def asearch_batch(
+        self,
+        query_vectors: Sequence[Sequence[float]],
+        k: int = 5,
+        filt: Optional[Filter] = None,
+        ef: Optional[int] = None,
+    ):
+        requests_ = [
+            QdrantSearchRequest(
+                vector=_normalize_vector(vec),
+                limit=k,
+                filter=filt,
+                with_payload=True,
+                params=self._search_params(ef),
+            )
+            for vec in query_vectors
+        ]
+        if not requests_:
+            return []
+        return await self._get_aclient().search_batch(collection_name=self.collection, requests=requests_)
+
+    def _search_params(self, ef: Optional[int] = None) -> SearchParams:
+        """Default params (quantization rescoring) plus an optional per-request HNSW candidate list size."""
+        if ef is None:
+            return self.search_params
+        return SearchParams(hnsw_ef=ef, quantization=self.search_params.quantization)
+
+    def _get_aclient(self) -> AsyncQdrantClient:
+        loop = asyncio.get_running_loop()
+        if self._aclient is None or self._aclient_loop is not loop:
+            self._aclient = AsyncQdrantClient(
+                url=self.url,
+                api_key=self.api_key,
+                timeout=QDRANT_TIMEOUT,
+                prefer_grpc=QDRANT_PREFER_GRPC,
+                grpc_port=QDRANT_GRPC_PORT,
+            )
+            self._aclient_loop = loop
+        return self._aclient
+
+    async def aclose(self) -> None:
+        if self._aclient is not None and self._aclient_loop is asyncio.get_running_loop():
+            await self._aclient.close()
+        self._aclient = None
+        self._aclient_loop = None
 
     def scroll_by_logical(self, logical_id: str, is_latest: Optional[bool] = None) -> List[Dict[str, Any]]:
         must = [FieldCondition(key="logical_id", match=MatchValue(value=logical_id))]
@@ -302,12 +784,115 @@ class VectorStore:
         res, _ = self.client.scroll(collection_name=self.collection, scroll_filter=filt, limit=100)
         return res
 
+    def scroll_by_logical_many(
+        self,
+        logical_ids: Sequence[str],
+        is_latest: Optional[bool] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Dict[str, List[Any]]:
+        """Points for many logical ids from one filtered scroll (paged), grouped by logical_id.
+
+        `fields` limits the returned payload to those keys (logical_id is always included).
+        """
+        with_payload = sorted({"logical_id", *fields}) if fields is not None else True
+        grouped: Dict[str, List[Any]] = {logical_id: [] for logical_id in logical_ids}
+        if not grouped:
+            return grouped
+        must = [FieldCondition(key="logical_id", match=MatchAny(any=list(grouped)))]
+        if is_latest is not None:
+            must.append(FieldCondition(key="is_latest", match=MatchValue(value=is_latest)))
+        filt = Filter(must=must)
+        offset = None
+        while True:
+            res, offset = self.client.scroll(
+                collection_name=self.collection,
+                scroll_filter=filt,
+                limit=max(100, 2 * len(grouped)),
+                offset=offset,
+                with_payload=with_payload,
+                with_vectors=False,
+            )
+            for point in res:
+                grouped.setdefault(point.payload.get("logical_id"), []).append(point)
+            if offset is None:
+                return grouped
+
+    def latest_by_path(
+        self, repo: str, paths: Sequence[str], fields: Optional[Sequence[str]] = None
+    ) -> Dict[str, Dict[str, List[Any]]]:
+        """Latest points of whole files from one filtered scroll (paged), grouped by path, then logical_id.
+
+        Unlike scroll_by_logical_many this also returns logical ids the current chunker no longer produces
+        for a file, so callers can retire them. `fields` limits the payload as in scroll_by_logical_many.
+        """
+        with_payload = sorted({"path", "logical_id", *fields}) if fields is not None else True
+        grouped: Dict[str, Dict[str, List[Any]]] = {path: {} for path in paths}
+        if not grouped:
+            return grouped
+        filt = Filter(
+            must=[
+                FieldCondition(key="repo", match=MatchValue(value=repo)),
+                FieldCondition(key="path", match=MatchAny(any=list(grouped))),
+                FieldCondition(key="is_latest", match=MatchValue(value=True)),
+            ]
+        )
+        offset = None
+        while True:
+            res, offset = self.client.scroll(
+                collection_name=self.collection,
+                scroll_filter=filt,
+                limit=256,
+                offset=offset,
+                with_payload=with_payload,
+                with_vectors=False,
+            )
+            for point in res:
+                by_logical = grouped.setdefault(point.payload.get("path"), {})
+                by_logical.setdefault(point.payload.get("logical_id"), []).append(point)
+            if offset is None:
+                return grouped
+
+    def vectors_by_content_hash(self, content_hashes: Sequence[str]) -> Dict[str, List[float]]:
+        """Stored vectors for content that is already indexed under a latest logical id, one per content_hash."""
+        wanted = list(dict.fromkeys(content_hashes))
+        found: Dict[str, List[float]] = {}
+        # A cold collection has nothing to reuse; skip the vector-carrying scroll entirely.
+        if not wanted or not self.client.count(collection_name=self.collection, exact=False).count:
+            return found
+        # Only latest points: superseded versions share hashes and would only inflate the pages.
+        filt = Filter(
+            must=[
+                FieldCondition(key="content_hash", match=MatchAny(any=wanted)),
+                FieldCondition(key="is_latest", match=MatchValue(value=True)),
+            ]
+        )
+        limit = max(100, len(wanted))
+        offset = None
+        while True:
+            res, offset = self.client.scroll(
+                collection_name=self.collection,
+                scroll_filter=filt,
+                limit=limit,
+                offset=offset,
+                with_payload=["content_hash"],
+                with_vectors=True,
+            )
+            for point in res:
+                content_hash = point.payload.get("content_hash")
+                if content_hash not in found and point.vector:
+                    found[content_hash] = point.vector
+            if offset is None or len(res) < limit or len(found) == len(wanted):
+                return found
+
 # ----------------------- git CLI wrapper -----------------------
 class GitCLI:
     def __init__(self, repo_path: str):
         # Normalize to an absolute path so Git's safe.directory check matches exactly.
         self.repo_path = os.path.abspath(repo_path)
         self._ensure_repo_marked_safe()
+        # Long-lived `git cat-file --batch` for commit:path reads; started on first use.
+        self._batch_proc: Optional[subprocess.Popen] = None
+        self._batch_lock = threading.Lock()
 
     def _ensure_repo_marked_safe(self) -> None:
         """Make sure Git trusts this repository path."""
@@ -343,6 +928,44 @@ class GitCLI:
         out = self._run_bytes(*args)
         return out.decode("utf-8", errors="ignore")
 
+    def _cat_file(self, commit: str, path: str) -> Optional[bytes]:
+        """Blob bytes for `commit:path` via the batch process, or None when git reports it missing/not a blob."""
+        with self._batch_lock:
+            proc = self._batch_proc
+            if proc is None or proc.poll() is not None:
+                proc = subprocess.Popen(
+                    ["git", "cat-file", "--batch"],
+                    cwd=self.repo_path,
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                )
+                self._batch_proc = proc
+                weakref.finalize(self, _close_batch_proc, proc)
+            try:
+                proc.stdin.write(f"{commit}:{path}\n".encode("utf-8", "surrogateescape"))
+                proc.stdin.flush()
+                header = proc.stdout.readline()
+                # "<oid> <type> <size>" for hits, "<name> missing" / "<name> ambiguous" otherwise.
+                meta, _, size = header.rstrip(b"\n").rpartition(b" ")
+                if not size.isdigit():
+                    if not header:
+                        raise RuntimeError("git cat-file --batch exited unexpectedly")
+                    return None
+                data = proc.stdout.read(int(size))
+                proc.stdout.read(1)  # trailing LF after the object contents
+            except Exception:
+                self._batch_proc = None
+                _close_batch_proc(proc)
+                raise
+            return data if meta.endswith(b" blob") else None
+
+    def close(self) -> None:
+        with self._batch_lock:
+            proc, self._batch_proc = self._batch_proc, None
+        if proc is not None:
+            _close_batch_proc(proc)
+
     def diff_unified_0(self, base: str, head: str) -> str:
         return self._run("diff", f"{base}..{head}", "--unified=0", "--ignore-blank-lines", "--ignore-space-at-eol", "--no-color")
     
@@ -367,11 +990,15 @@ class GitCLI:
             full_path = os.path.join(self.repo_path, path)
             try:
                 with open(full_path, "rb") as f:
-                    raw = f.read()
-                if _is_probably_binary(raw):
-                    logger.info("Skipping binary working tree file: %s", path)
-                    return None
-                return raw.decode("utf-8", errors="ignore")
+                    # Sniff the head first so large binaries (images, archives) are skipped without a full read.
+                    head = f.read(_BINARY_SNIFF_BYTES)
+                    if _is_probably_binary(head):
+                        logger.info("Skipping binary working tree file: %s", path)
+                        return None
+                    # Decode the sniffed head and the rest separately instead of copying them into one buffer;
+                    # the incremental decoder keeps a character split across the boundary intact.
+                    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+                    return decoder.decode(head) + decoder.decode(f.read(), final=True)
             except FileNotFoundError:
                 return None
             except RuntimeError:
@@ -381,12 +1008,30 @@ class GitCLI:
                 return None
         # 2. 커밋/참조 모드: Git 히스토리에서 파일 읽기 (commit is not None)
         else:
+            # Only full shas are cached; refs like HEAD or branch names can move.
+            cache_key = (self.repo_path, commit, path) if _FULL_SHA_RE.fullmatch(commit) else None
+            if cache_key is not None:
+                cached = _BLOB_CACHE.get(cache_key)
+                if cached is not _MISSING:
+                    return cached
+            raw = None
+            if "\n" not in path:
+                try:
+                    raw = self._cat_file(commit, path)
+                except (OSError, RuntimeError) as e:
+                    logger.warning("git cat-file --batch failed for %s:%s (%s); falling back to git show", commit, path, e)
             try:
-                raw = self._run_bytes("show", f"{commit}:{path}")
+                # Missing objects go through `git show` too, which tells "not in this commit" apart from bad refs.
+                if raw is None:
+                    raw = self._run_bytes("show", f"{commit}:{path}")
                 if _is_probably_binary(raw):
                     logger.info("Skipping binary file from commit %s: %s", commit, path)
-                    return None
-                return raw.decode("utf-8", errors="ignore")
+                    text = None
+                else:
+                    text = raw.decode("utf-8", errors="ignore")
+                if cache_key is not None:
+                    _BLOB_CACHE.put(cache_key, text)
+                return text
             except RuntimeError as e:
                 # _run이 Git 명령 실패 시 RuntimeError를 발생시킨다고 가정합니다.
                 error_message = str(e).lower()
@@ -405,15 +1050,62 @@ class GitCLI:
                 raise e
 
     def list_files(self, commit: Optional[str] = None) -> List[str]:
+        # -z: NUL-separated raw paths, so names with spaces, quotes or non-ASCII bytes are not C-quoted by git.
         if commit:
-            out = self._run("ls-tree", "-r", "--name-only", commit)
+            out = self._run_bytes("ls-tree", "-r", "--name-only", "-z", commit)
         else:
-            out = subprocess.check_output(["git", "--no-pager", "ls-files"], cwd=self.repo_path, stderr=subprocess.STDOUT, timeout=60).decode("utf-8")
-        return [line.strip() for line in out.splitlines() if line.strip()]
+            out = subprocess.check_output(["git", "--no-pager", "ls-files", "-z"], cwd=self.repo_path, stderr=subprocess.STDOUT, timeout=60)
+        return [p.decode("utf-8", "surrogateescape") for p in out.split(b"\0") if p]
 
     def get_head(self) -> str:
         return self._run("rev-parse", "HEAD").strip()
 
+_MISSING = object()
+
+
+class _BlobCache:
+    """Thread-safe LRU of decoded blobs (None for binaries) shared by every GitCLI in the process."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[str, str, str], Optional[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str, str]) -> Any:
+        with self._lock:
+            if key not in self._entries:
+                return _MISSING
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key: Tuple[str, str, str], text: Optional[str]) -> None:
+        if self.maxsize == 0:
+            return
+        with self._lock:
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_BLOB_CACHE = _BlobCache(GIT_BLOB_CACHE_SIZE)
+
+
+def _close_batch_proc(proc: subprocess.Popen) -> None:
+    try:
+        if proc.stdin:
+            proc.stdin.close()
+        proc.wait(timeout=5)
+    except Exception:
+        proc.kill()
+    finally:
+        if proc.stdout:
+            proc.stdout.close()
+
 # ----------------------- diff + translation -----------------------
 @dataclass
 class Hunk:
@@ -430,6 +1122,12 @@ class FileDiff:
     old_path: Optional[str] = None
     new_path: Optional[str] = None
 
+
+_DIFF_GIT_RE = re.compile(r"^diff --git a/(?P<old>.+?) b/(?P<new>.+)$")
+# Groups: base start, base length, head start, head length (lengths default to 1 when omitted).
+_HUNK_RE = re.compile(r"@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
 class DiffUtil:
     @staticmethod
     def parse_unified_diff(text: str) -> List[FileDiff]:
@@ -449,8 +1147,8 @@ class DiffUtil:
         # per-file deleted marker (can be set by 'deleted file mode' line)
         deleted_flag = False
 
-        for raw_line in io.StringIO(text):
-            line = raw_line.rstrip("\n")
+        # split("\n") rather than splitlines(): diff bodies may contain \r, \f or U+2028, which must not start new lines.
+        for line in text.split("\n"):
 
             # new file-diff header
             if line.startswith("diff --git "):
@@ -468,7 +1166,7 @@ class DiffUtil:
                 deleted_flag = False
 
                 # try to parse "diff --git a/foo b/foo" for immediate path info
-                m = re.match(r"^diff --git a/(?P<old>.+?) b/(?P<new>.+)$", line)
+                m = _DIFF_GIT_RE.match(line)
                 if m:
                     parsed_old = m.group("old")
                     parsed_new = m.group("new")
@@ -521,17 +1219,15 @@ class DiffUtil:
 
             # hunk header
             if line.startswith("@@ ") and current is not None:
-                pattern = r"@@ -(?P<bstart>\d+)(?:,(?P<blen>\d+))? \+(?P<hstart>\d+)(?:,(?P<hlen>\d+))? @@.*"
-                m = re.match(pattern, line)
+                m = _HUNK_RE.match(line)
                 if m:
-                    blen = int(m.group('blen')) if m.group('blen') else 1
-                    hlen = int(m.group('hlen')) if m.group('hlen') else 1
+                    bstart, blen, hstart, hlen = m.groups()
                     current.hunks.append(
                         Hunk(
-                            int(m.group('bstart')),
-                            blen,
-                            int(m.group('hstart')),
-                            hlen
+                            int(bstart),
+                            int(blen) if blen else 1,
+                            int(hstart),
+                            int(hlen) if hlen else 1
                         )
                     )
                 continue
@@ -567,14 +1263,14 @@ _EXT_TO_LANG = {
 }
 
 _TS_NODE_TYPES = {
-    "javascript": ["function_declaration", "method_definition", "class_declaration"],
-    "typescript": ["function_declaration", "method_definition", "class_declaration"],
-    "java": ["class_declaration", "interface_declaration", "method_declaration"],
-    "go": ["function_declaration", "method_declaration", "type_declaration"],
-    "c": ["function_definition"], 
-    "cpp": ["function_definition", "class_specifier"],
-    "rust": ["function_item", "impl_item", "trait_item", "struct_item", "enum_item"],
-    "python": ["class_definition", "function_definition", "decorated_definition"], # 👈 Python 추가
+    "javascript": frozenset({"function_declaration", "method_definition", "class_declaration"}),
+    "typescript": frozenset({"function_declaration", "method_definition", "class_declaration"}),
+    "java": frozenset({"class_declaration", "interface_declaration", "method_declaration"}),
+    "go": frozenset({"function_declaration", "method_declaration", "type_declaration"}),
+    "c": frozenset({"function_definition"}), 
+    "cpp": frozenset({"function_definition", "class_specifier"}),
+    "rust": frozenset({"function_item", "impl_item", "trait_item", "struct_item", "enum_item"}),
+    "python": frozenset({"class_definition", "function_definition", "decorated_definition"}), # 👈 Python 추가
 }
 
 # Extensions we intentionally skip during chunking (binary Excel files, etc.).
@@ -647,34 +1343,33 @@ class Chunker:
         max_content_chars = max(256, max_content_chars or MAX_CONTENT_CHARS)
 
         try:
-            language = get_language(lang)
+            parser = _ts_parser(lang)
         except Exception as e:
             logger.error(f"Failed to load Tree-sitter language '{lang}': {e}")
             return Chunker.generic_chunks(src, path, repo)
-        
-        parser = Parser()
-        parser.set_language(language)
         b = src.encode("utf-8")
+        # Hash node bytes straight from the encoded source rather than re-encoding each decoded chunk.
+        bview = memoryview(b)
+        # Byte offsets are character offsets in ASCII sources, so node text can be sliced from src without decoding.
+        ascii_src = src.isascii()
 
         logger.info("ts chunk")
 
         try:
             tree = parser.parse(b)
-            node_types = set(_TS_NODE_TYPES[lang])
+            node_types = _TS_NODE_TYPES[lang]
+            # Many symbols share an enclosing class/impl; resolve each block's id and range once per file.
+            block_meta: Dict[int, Tuple[Any, str, Range]] = {}
             out = []
 
-            def enclosing_block(n):
-                p = n.parent
-                # Python을 포함한 다양한 언어의 블록 타입을 처리하도록 업데이트
-                # Python: class_definition, function_definition
-                while p and p.type not in ("class_declaration", "impl_item", "trait_item", "struct_item", "enum_item", "function_definition", "class_definition"): 
-                    p = p.parent
-                return p
-
             def split_into_chunks(text: str, start_line: int, end_line: int, byte_start: int, byte_end: int, symbol: str, logical_id_base: str, sig_hash: str, block_id: str, block_range: Optional[Range], part_num: int = 1) -> List[Chunk]:
                 """긴 텍스트를 max_content_chars 단위로 분할하여 여러 Chunk 생성"""
                 chunks = []
                 current_pos = 0
+                lines_before = 0
+                # Part offsets are character offsets added to the node's byte offset, which only line up with
+                # the encoded source when the text is ASCII; otherwise hash the re-encoded part.
+                ascii_text = text.isascii()
                 while current_pos < len(text):
                     split_end = min(current_pos + max_content_chars, len(text))
                     # 줄 경계에서 자르기 위해 마지막 \n 찾기
@@ -684,14 +1379,18 @@ class Chunker:
                     sub_text = text[current_pos:split_end]
                     
                     # 위치 조정 (대략적; 정확한 byte/line 계산 필요 시 _line_to_byte 등 사용)
-                    sub_start_line = start_line + text[:current_pos].count('\n')
-                    sub_end_line = start_line + text[:split_end].count('\n')
+                    # Running newline count, so each character is scanned once rather than once per later part.
+                    sub_start_line = start_line + lines_before
+                    lines_before += sub_text.count('\n')
+                    sub_end_line = start_line + lines_before
                     sub_byte_start = byte_start + current_pos
                     sub_byte_end = byte_start + split_end
                     
                     part_symbol = f"{symbol}_part{part_num}"
                     part_logical_id = f"{logical_id_base}_part{part_num}"
-                    part_content_hash = sha256(sub_text.encode())
+                    part_content_hash = (
+                        sha256(bview[sub_byte_start:sub_byte_end]) if ascii_text else sha256(sub_text.encode())
+                    )
                     
                     chunks.append(Chunk(
                         logical_id=part_logical_id, symbol=part_symbol, path=path, language=lang,
@@ -709,14 +1408,20 @@ class Chunker:
                 
                 return chunks
 
-            def walk(n):
-                # ... (기존 walk 로직 유지) ...
+            # Pre-order walk with a TreeCursor: moves happen in C and no per-node children list is built.
+            # `parents` holds the enclosing block of each ancestor level, so no node has to climb its parent chain.
+            cursor = tree.walk()
+            parents: List[Any] = []
+            enclosing = None
+            walking = True
+            while walking:
+                n = cursor.node
                 if n.type in node_types:
                     start_line = n.start_point[0] + 1
                     end_line = n.end_point[0] + 1
                     byte_start = n.start_byte
                     byte_end = n.end_byte
-                    text = b[byte_start:byte_end].decode("utf-8", errors="ignore")
+                    text = src[byte_start:byte_end] if ascii_src else b[byte_start:byte_end].decode("utf-8", errors="ignore")
                     
                     # Tree-sitter는 구문 오류 시 ERROR 노드를 삽입하지만, 전체 AST는 파싱하므로
                     # 이 로직은 SyntaxError에 강건합니다.
@@ -725,18 +1430,21 @@ class Chunker:
                     prefix = "class:" if "class" in n.type or n.type in ("struct_item", "enum_item", "trait_item", "class_definition") else "func:"
                     symbol = f"{prefix}{name}"
                     logical_id = f"{repo}:{path}#{symbol}"
-                    content_hash = sha256(text.encode())
-                    sig_hash = sha256((n.type + ":" + name).encode())
-                    blk = enclosing_block(n)
+                    content_hash = sha256(bview[byte_start:byte_end])
+                    sig_hash = _sig_hash(n.type, name)
+                    blk = enclosing
                     block_id = block_range = None
                     if blk:
-                        bstart = blk.start_point[0] + 1
-                        bend = blk.end_point[0] + 1
-                        b_beg = blk.start_byte
-                        b_end = blk.end_byte
-                        bname = _ts_first_identifier(blk, b) or blk.type
-                        block_id = f"block:{blk.type}:{bname}"
-                        block_range = Range(bstart, bend, b_beg, b_end)
+                        meta = block_meta.get(id(blk))
+                        if meta is None:
+                            bstart = blk.start_point[0] + 1
+                            bend = blk.end_point[0] + 1
+                            b_beg = blk.start_byte
+                            b_end = blk.end_byte
+                            bname = _ts_first_identifier(blk, b) or blk.type
+                            # Keep blk in the entry so its id() cannot be reused by another node.
+                            meta = block_meta[id(blk)] = (blk, f"block:{blk.type}:{bname}", Range(bstart, bend, b_beg, b_end))
+                        _, block_id, block_range = meta
                     
                     # 길이 제한 체크 및 분할
                     if len(text) > max_content_chars:
@@ -751,9 +1459,16 @@ class Chunker:
                             range=Range(start_line, end_line, byte_start, byte_end), content=text,
                             content_hash=content_hash, sig_hash=sig_hash, block_id=block_id, block_range=block_range,
                         ))
-                for i in range(n.child_count):
-                    walk(n.children[i])
-            walk(tree.root_node)
+                if cursor.goto_first_child():
+                    parents.append(enclosing)
+                    if n.type in _TS_BLOCK_TYPES:
+                        enclosing = n
+                    continue
+                while not cursor.goto_next_sibling():
+                    if not cursor.goto_parent():
+                        walking = False
+                        break
+                    enclosing = parents.pop()
             return out or Chunker.generic_chunks(src, path, repo) # 청크를 찾지 못하면 generic으로 폴백
 
         except Exception as e:
@@ -766,14 +1481,21 @@ class Chunker:
         max_content_chars = max(256, max_content_chars or MAX_CONTENT_CHARS)
         out = []
         lines = src.splitlines(True)
-        i = 0
-        line_no = 1
-        joined = ''.join(lines)
+        # offsets[n] is where line n+1 starts in src (offsets[-1] == len(src)), so each window is a single
+        # slice of src instead of a per-window join plus two linear _line_to_byte scans.
+        offsets = list(itertools.accumulate(map(len, lines), initial=0))
+        # For ASCII sources (the common case) character offsets are byte offsets, so every chunk hash can be
+        # taken from a memoryview slice of one encoded buffer instead of re-encoding each chunk's text.
+        src_bytes = memoryview(src.encode()) if src.isascii() else None
+
+        def content_sha(text: str, start: int, end: int) -> str:
+            return sha256(src_bytes[start:end]) if src_bytes is not None else sha256(text.encode())
 
         def split_into_chunks(text: str, start_line: int, end_line: int, byte_start: int, byte_end: int, symbol: str, logical_id_base: str, sig_hash: str, block_id: Optional[str] = None, block_range: Optional[Range] = None, part_num: int = 1) -> List[Chunk]:
             """긴 텍스트를 max_content_chars 단위로 분할하여 여러 Chunk 생성"""
             chunks = []
             current_pos = 0
+            lines_before = 0
             while current_pos < len(text):
                 split_end = min(current_pos + max_content_chars, len(text))
                 # 줄 경계에서 자르기 위해 마지막 \n 찾기
@@ -783,14 +1505,15 @@ class Chunker:
                 sub_text = text[current_pos:split_end]
                 
                 # 위치 조정
-                sub_start_line = start_line + text[:current_pos].count('\n')
-                sub_end_line = start_line + text[:split_end].count('\n')
+                sub_start_line = start_line + lines_before
+                lines_before += sub_text.count('\n')
+                sub_end_line = start_line + lines_before
                 sub_byte_start = byte_start + current_pos
                 sub_byte_end = byte_start + split_end
                 
                 part_symbol = f"{symbol}_part{part_num}"
                 part_logical_id = f"{logical_id_base}_part{part_num}"
-                part_content_hash = sha256(sub_text.encode())
+                part_content_hash = content_sha(sub_text, sub_byte_start, sub_byte_end)
                 
                 chunks.append(Chunk(
                     logical_id=part_logical_id, symbol=part_symbol, path=path, language="generic",
@@ -808,16 +1531,16 @@ class Chunker:
             
             return chunks
 
-        while i < len(lines):
-            segment = lines[i:i + lines_per_chunk]
-            text = ''.join(segment)
-            start = line_no
-            end = line_no + len(segment) - 1
-            byte_start = _line_to_byte(joined, start)
-            byte_end = _line_to_byte(joined, end + 1)
+        for i in range(0, len(lines), lines_per_chunk):
+            j = min(i + lines_per_chunk, len(lines))
+            byte_start = offsets[i]
+            byte_end = offsets[j]
+            text = src[byte_start:byte_end]
+            start = i + 1
+            end = j
             symbol = f"range:{start:04d}-{end:04d}"
             logical_id = f"{repo}:{path}#{symbol}"
-            sig_hash = sha256(symbol.encode())
+            sig_hash = _range_sig_hash(symbol)
             
             # 길이 제한 체크 및 분할
             if len(text) > max_content_chars:
@@ -827,32 +1550,39 @@ class Chunker:
                     symbol, logical_id, sig_hash
                 ))
             else:
-                content_hash = sha256(text.encode())
+                content_hash = content_sha(text, byte_start, byte_end)
                 out.append(Chunk(
                     logical_id=logical_id, symbol=symbol, path=path, language="generic",
                     range=Range(start, end, byte_start, byte_end), content=text,
                     content_hash=content_hash, sig_hash=sig_hash,
                 ))
-            i += lines_per_chunk
-            line_no += len(segment)
         return out
 
 # ----------------------- relocalizer -----------------------
 class Relocalizer:
     @staticmethod
-    def exact_relocate(base_slice: str, head_src: str) -> Optional[Tuple[int, int]]:
+    def exact_relocate(
+        base_slice: str, head_src: str, starts: Optional[List[int]] = None
+    ) -> Optional[Tuple[int, int]]:
         idx = head_src.find(base_slice)
         if idx == -1:
             return None
-        return _byte_to_line(head_src, idx), _byte_to_line(head_src, idx + len(base_slice)) - 1
+        return _span_to_lines(head_src, idx, idx + len(base_slice), starts)
 
     @staticmethod
-    def fuzzy_relocate(base_slice: str, head_src: str, window: int = 2000) -> Optional[Tuple[int, int]]:
-        base_hash = sha256(base_slice.encode())
-        for s in range(0, max(0, len(head_src) - window + 1), max(1, window // 4)):
-            win = head_src[s:s + window]
-            if sha256(win.encode()) == base_hash:
-                return _byte_to_line(head_src, s), _byte_to_line(head_src, s + len(win)) - 1
+    def fuzzy_relocate(
+        base_slice: str, head_src: str, window: int = 2000, starts: Optional[List[int]] = None
+    ) -> Optional[Tuple[int, int]]:
+        # A window's hash can only equal the slice's when the window *is* the slice, so instead of hashing every
+        # stepped window, find the slice directly and accept the first occurrence on a window boundary.
+        if len(base_slice) != window:
+            return None
+        step = max(1, window // 4)
+        idx = head_src.find(base_slice)
+        while idx != -1:
+            if idx % step == 0:
+                return _span_to_lines(head_src, idx, idx + window, starts)
+            idx = head_src.find(base_slice, idx + 1)
         return None
 
 # ----------------------- indexer -----------------------
@@ -889,7 +1619,8 @@ class Indexer:
         # [변경 코멘트: Qdrant ID 최종 수정 (UUID 방식)] 
         # Qdrant가 요구하는 UUID 형식의 ID를 생성하기 위해 UUID v5를 사용합니다. 
         # UUID v5는 입력 문자열(unique_identifier)이 동일하면 항상 동일한 UUID를 생성합니다.
-        point_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, unique_identifier))
+        point_id = _point_id(unique_identifier)
+        r, br = c.range, c.block_range
         payload = {
             "point_id": point_id,
             "logical_id": c.logical_id,
@@ -901,14 +1632,17 @@ class Indexer:
             "content_hash": c.content_hash,
             "sig_hash": c.sig_hash,
             "is_latest": True,
-            "lines": [c.range.start_line, c.range.end_line],
-            "byte_range": [c.range.byte_start, c.range.byte_end],
+            "lines": [r.start_line, r.end_line],
+            "byte_range": [r.byte_start, r.byte_end],
             "language": c.language,
             "neighbors": c.neighbors,
             "block_id": c.block_id,
-            "block_lines": [c.block_range.start_line, c.block_range.end_line] if c.block_range else None,
-            "block_byte_range": [c.block_range.byte_start, c.block_range.byte_end] if c.block_range else None,
+            "block_lines": None,
+            "block_byte_range": None,
         }
+        if br is not None:
+            payload["block_lines"] = [br.start_line, br.end_line]
+            payload["block_byte_range"] = [br.byte_start, br.byte_end]
         edges: List[Dict[str, Any]] = []
         if self.base_payload:
             payload.update(self.base_payload)
@@ -933,28 +1667,54 @@ class Indexer:
             payload["edges"] = dedupe_edges(edges + payload.get("edges", []))
         return payload
 
+    def _embed_chunks(self, chunks: List[Chunk]) -> List[List[float]]:
+        """Vectors for `chunks`, reusing stored vectors for content already indexed (moved code, re-runs)."""
+        known = self.store.vectors_by_content_hash([c.content_hash for c in chunks])
+        missing = list({c.content_hash: c for c in chunks if c.content_hash not in known}.values())
+        if missing:
+            known.update(zip((c.content_hash for c in missing), self.emb.embed([c.content for c in missing])))
+        return [known[c.content_hash] for c in chunks]
+
     def full_index(self, head: str, branch: str = "main"):
         files = self.git.list_files(head)
         logger.info(f"full index files {files}")
-        to_embed = []
+        jobs = []
         for path in files:
             head_src = self.git.show_file(head, path) or ""
             logger.debug(f"full index head src {head_src}")
             if head_src:
-                to_embed.extend(
-                    Chunker.chunks(
-                        head_src,
-                        path,
-                        self.repo_name,
-                        stack_type=self.stack_type,
-                        plugins=self.chunk_plugins,
-                    )
-                )
-        if to_embed:
-            texts = [c.content for c in to_embed]
-            vectors = self.emb.embed(texts)
-            points = [PointStruct(id=self._build_payload(c, branch, head)["point_id"], vector=v, payload=self._build_payload(c, branch, head)) for c, v in zip(to_embed, vectors)]
-            self.store.upsert_points(points)
+                jobs.append((head_src, path, self.repo_name, self.stack_type, self.chunk_plugins))
+        to_embed = [c for file_chunks in _chunk_files(jobs) for c in file_chunks]
+        written: Set[str] = set()
+        # Embed window i+1 while a single writer thread upserts window i, so TEI and Qdrant work overlap.
+        window = INDEX_PIPELINE_WINDOW
+        with self.store.bulk_load(), ThreadPoolExecutor(max_workers=1, thread_name_prefix="index-upsert") as writer:
+            pending = None
+            for start in range(0, len(to_embed), window):
+                part = to_embed[start:start + window]
+                vectors = self._embed_chunks(part)
+                payloads = [self._build_payload(c, branch, head) for c in part]
+                ids = [p["point_id"] for p in payloads]
+                written.update(ids)
+                if pending is not None:
+                    pending.result()
+                pending = writer.submit(self.store.upsert_batch, ids, vectors, payloads)
+            if pending is not None:
+                pending.result()
+        self._retire_unwritten(files, written)
+
+    def _retire_unwritten(self, paths: Sequence[str], written: Set[str]) -> None:
+        """Mark latest points of `paths` that a full index did not rewrite (removed or edited chunks) as superseded."""
+        indexed = self.store.latest_by_path(self.repo_name, paths, fields=())
+        stale = [
+            point.id
+            for by_logical in indexed.values()
+            for points in by_logical.values()
+            for point in points
+            if point.id not in written
+        ]
+        if stale:
+            self.store.set_payloads([(stale, {"is_latest": False})])
 
     def index_commit(self, base: str, head: Optional[str] = None, branch: str = "main"):
         commit_sha = head or base  # For local mode, use base commit
@@ -1004,6 +1764,7 @@ class Indexer:
         logger.info(f"diff test {diff_text[:500]}")
         logger.info(f"file diffs {file_diffs}")
 
+        chunked = []
         for fd in file_diffs:
             # 로컬 모드에서는 head_src를 파일 시스템에서 읽어옵니다.
             # 커밋 모드에서는 git.show_file(head, ...)를 사용합니다.
@@ -1011,6 +1772,8 @@ class Indexer:
             logger.debug(f"index commit : head_src {head_src}")
             
             if not head_src:
+                # Deleted or emptied: every point still indexed for the file is retired below.
+                chunked.append((fd, head_src, {}))
                 continue
             try:
                 # [수정 코멘트: Chunking 오류 방지] 구문 분석 오류 발생 시 로깅 후 다음 파일로 넘어감
@@ -1030,47 +1793,86 @@ class Indexer:
                 # 이 파일은 인덱싱 대상에서 제외하고 다음 루프로 넘어갑니다.
                 continue
 
+            chunked.append((fd, head_src, head_chunks))
+
+        # One scroll for every file in the commit; the results also drive the retire/reposition writes below.
+        indexed = self.store.latest_by_path(
+            self.repo_name, [fd.path for fd, _, _ in chunked], fields=("content_hash", "byte_range")
+        )
+        # Changes from every file are collected so the whole commit is embedded and written in one pass.
+        to_embed = []
+        to_update_only_pos = []
+        retire_ids = []
+        for fd, head_src, head_chunks in chunked:
+            prev_by_logical = indexed.get(fd.path, {})
+            # Logical ids the chunker no longer produces for this file (removed symbols, renamed chunks).
+            live = {ch.logical_id for ch in head_chunks.values()}
+            retire_ids.extend(
+                p.id for logical_id, points in prev_by_logical.items() if logical_id not in live for p in points
+            )
+            if not head_chunks:
+                continue
             base_src = self.git.show_file(base, fd.path) or ""
             logger.debug(f"index commit : base_src {base_src}")
-            to_embed = []
-            to_update_only_pos = []
+            head_starts = None
             for _, ch in head_chunks.items():
-                prev_points = self.store.scroll_by_logical(ch.logical_id, is_latest=True)
+                prev_points = prev_by_logical.get(ch.logical_id, [])
                 if not prev_points:
                     to_embed.append(ch)
                     continue
                 prev = prev_points[0]
                 if prev.payload.get("content_hash") != ch.content_hash:
                     to_embed.append(ch)
+                    retire_ids.extend(p.id for p in prev_points)
                 else:
                     translated = DiffUtil.translate(ch.range, fd.hunks)
                     if translated.relocalize and base_src:
                         br = prev.payload.get("byte_range", [ch.range.byte_start, ch.range.byte_end])
                         base_slice = base_src[br[0]:br[1]] if 0 <= br[0] <= br[1] <= len(base_src) else ""
                         if base_slice:
-                            loc = Relocalizer.exact_relocate(base_slice, head_src) or Relocalizer.fuzzy_relocate(base_slice, head_src)
+                            if head_starts is None:
+                                head_starts = _line_starts(head_src)
+                            loc = Relocalizer.exact_relocate(base_slice, head_src, head_starts) or Relocalizer.fuzzy_relocate(
+                                base_slice, head_src, starts=head_starts
+                            )
                             if loc:
                                 translated = Range(loc[0], loc[1], br[0], br[1], False)
-                    to_update_only_pos.append((ch, translated))
-            if to_embed:
-                texts = [c.content for c in to_embed]
-                vectors = self.emb.embed(texts)
-                points = []
-                for c, v in zip(to_embed, vectors):
-                    olds = self.store.scroll_by_logical(c.logical_id, is_latest=True)
-                    if olds:
-                        self.store.set_payload([p.id for p in olds], {"is_latest": False})
-                    payload = self._build_payload(c, branch, commit_sha)
-                    points.append(PointStruct(id=payload["point_id"], vector=v, payload=payload))
-                self.store.upsert_points(points)
-            if to_update_only_pos:
-                ids = [p.id for _, olds in [(None, self.store.scroll_by_logical(ch.logical_id, is_latest=True)) for ch, _ in to_update_only_pos] for p in olds if olds]
-                if ids:
-                    # Batch update positions (simplified; group by unique range if needed)
-                    for ch, r in to_update_only_pos:
-                        olds = self.store.scroll_by_logical(ch.logical_id, is_latest=True)
-                        if olds:
-                            self.store.set_payload([p.id for p in olds], {"lines": [r.start_line, r.end_line]})
+                    to_update_only_pos.append(([p.id for p in prev_points], translated))
+        # Retiring replaced points and moving unchanged ones share one batch_update_points call. It goes out after
+        # embedding (a failed embed retires nothing) and before the upsert (a retire never hits a fresh point).
+        updates = [(ids, {"lines": [r.start_line, r.end_line]}) for ids, r in to_update_only_pos]
+        updates.append((retire_ids, {"is_latest": False}))
+        if to_embed:
+            vectors = self._embed_chunks(to_embed)
+            payloads = [self._build_payload(c, branch, commit_sha) for c in to_embed]
+        self.store.set_payloads(updates)
+        if to_embed:
+            self.store.upsert_batch([p["point_id"] for p in payloads], vectors, payloads)
+
+@functools.lru_cache(maxsize=65536)
+def _point_id(unique_identifier: str) -> str:
+    # Unchanged chunks map to the same id on every full/update run, so repeated runs skip the SHA-1.
+    return str(uuid.uuid5(uuid.NAMESPACE_DNS, unique_identifier))
+
+
+def _chunk_file(job: Tuple[str, str, str, Optional[str], List[ChunkPlugin]]) -> List[Chunk]:
+    src, path, repo, stack_type, plugins = job
+    return Chunker.chunks(src, path, repo, stack_type=stack_type, plugins=plugins)
+
+
+def _chunk_files(jobs: List[Tuple[str, str, str, Optional[str], List[ChunkPlugin]]]) -> List[List[Chunk]]:
+    """Chunk files in order, fanning out to CHUNK_WORKERS processes when enabled (parsing is CPU-bound)."""
+    workers = min(CHUNK_WORKERS, len(jobs))
+    if workers > 1:
+        try:
+            # spawn, not fork: forking a process that already runs executor and client threads can deadlock the child.
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+                return list(pool.map(_chunk_file, jobs, chunksize=8))
+        except Exception as exc:
+            logger.warning("Parallel chunking failed (%s); chunking %d files serially", exc, len(jobs))
+    return [_chunk_file(job) for job in jobs]
+
 
 # ----------------------- retriever -----------------------
 class Retriever:
@@ -1091,9 +1893,92 @@ class Retriever:
         component_type: Optional[str] = None,
         screen_name: Optional[str] = None,
         tags: Optional[List[str]] = None,
+        logical_ids: Optional[List[str]] = None,
+        query_vector: Optional[List[float]] = None,
+        ef: Optional[int] = None,
     ) -> List[Dict[str, Any]]:
-        vec = self.emb.embed([query])[0]
-        
+        # Callers that already embedded the query (e.g. via the API's EmbeddingBatcher) skip the TEI hop.
+        vec = query_vector if query_vector is not None else self.emb.embed([query])[0]
+        filt = self._build_filter(branch, repo, stack_type, component_type, screen_name, tags, logical_ids)
+        hits = self.store.search(vec, k=k, filt=filt, ef=ef)
+
+        logger.debug(f"hits {hits}")
+
+        return self._annotate_hits([hits])[0]
+
+    def search_batch(
+        self,
+        queries: List[str],
+        k: int = 5,
+        branch: str = "main",
+        repo: Optional[str] = None,
+        stack_type: Optional[str] = None,
+        component_type: Optional[str] = None,
+        screen_name: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        logical_ids: Optional[List[str]] = None,
+        query_vectors: Optional[List[List[float]]] = None,
+        ef: Optional[int] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """Run several queries with one embedding call and one Qdrant batch request; results keep input order."""
+        if not queries:
+            return []
+        vectors = query_vectors if query_vectors is not None else self.emb.embed(queries)
+        filt = self._build_filter(branch, repo, stack_type, component_type, screen_name, tags, logical_ids)
+        batches = self.store.search_batch(vectors, k=k, filt=filt, ef=ef)
+        return self._annotate_hits(batches)
+
+    async def asearch(
+        self,
+        query: str,
+        k: int = 5,
+        branch: str = "main",
+        repo: Optional[str] = None,
+        stack_type: Optional[str] = None,
+        component_type: Optional[str] = None,
+        screen_name: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        logical_ids: Optional[List[str]] = None,
+        query_vector: Optional[List[float]] = None,
+        ef: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Event-loop friendly `search`: awaits TEI and Qdrant, reads hit files on a worker thread."""
+        vec = query_vector if query_vector is not None else (await self.emb.aembed([query]))[0]
+        filt = self._build_filter(branch, repo, stack_type, component_type, screen_name, tags, logical_ids)
+        hits = await self.store.asearch(vec, k=k, filt=filt, ef=ef)
+        return (await asyncio.to_thread(self._annotate_hits, [hits]))[0]
+
+    async def asearch_batch(
+        self,
+        queries: List[str],
+        k: int = 5,
+        branch: str = "main",
+        repo: Optional[str] = None,
+        stack_type: Optional[str] = None,
+        component_type: Optional[str] = None,
+        screen_name: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        logical_ids: Optional[List[str]] = None,
+        query_vectors: Optional[List[List[float]]] = None,
+        ef: Optional[int] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        if not queries:
+            return []
+        vectors = query_vectors if query_vectors is not None else await self.emb.aembed(queries)
+        filt = self._build_filter(branch, repo, stack_type, component_type, screen_name, tags, logical_ids)
+        batches = await self.store.asearch_batch(vectors, k=k, filt=filt, ef=ef)
+        return await asyncio.to_thread(self._annotate_hits, batches)
+
+    @staticmethod
+    def _build_filter(
+        branch: str,
+        repo: Optional[str] = None,
+        stack_type: Optional[str] = None,
+        component_type: Optional[str] = None,
+        screen_name: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        logical_ids: Optional[List[str]] = None,
+    ) -> Filter:
         # [변경 코멘트: 논리적 오류 수정] 필터 생성 로직이 두 번 반복되고 'repo: Optional[str] = None'이 필터 정의 내부에 잘못 삽입되어 있었습니다.
         must_conditions = [
             FieldCondition(key="is_latest", match=MatchValue(value=True)),
@@ -1109,45 +1994,95 @@ class Retriever:
             must_conditions.append(FieldCondition(key="screen_name", match=MatchValue(value=screen_name)))
         if tags:
             must_conditions.append(FieldCondition(key="tags", match=MatchAny(any=sorted(set(tags)))))
+        if logical_ids:
+            # Candidates already known to the caller (e.g. from the symbol graph); served by the logical_id index.
+            must_conditions.append(FieldCondition(key="logical_id", match=MatchAny(any=sorted(set(logical_ids)))))
+        return Filter(must=must_conditions)
+
+    def _annotate_hits(self, batches: List[List[Any]]) -> List[List[Dict[str, Any]]]:
+        sources = self._load_sources([h for hits in batches for h in hits])
+        return [[self._annotate_hit(h, sources) for h in hits] for hits in batches]
+
+    def _load_sources(self, hits: List[Any]) -> Dict[str, Tuple[bytes, List[int]]]:
+        """Read each distinct hit file once, on a small thread pool when several files are involved."""
+        if not self.repo_path:
+            return {}
+        paths = list(
+            dict.fromkeys(
+                os.path.join(self.repo_path, h.payload["path"])
+                for h in hits
+                if h.payload.get("path") and h.payload.get("block_lines")
+            )
+        )
 
-        filt = Filter(must=must_conditions)
-        
-        hits = self.store.search(vec, k=k, filt=filt)
-        results = []
+        def load(file_path: str) -> Optional[Tuple[bytes, List[int]]]:
+            try:
+                with open(file_path, "rb") as f:
+                    src = f.read()
+            except OSError:
+                # _annotate_hit retries the read and logs the failure for the affected hit.
+                return None
+            return src, _line_starts(src)
 
-        logger.debug(f"hits {hits}")
+        if len(paths) > 1:
+            with ThreadPoolExecutor(max_workers=min(HIT_READ_WORKERS, len(paths)), thread_name_prefix="hit-read") as pool:
+                loaded = list(pool.map(load, paths))
+        else:
+            loaded = [load(path) for path in paths]
+        return {path: cached for path, cached in zip(paths, loaded) if cached is not None}
 
-        for h in hits:
-            item = {"id": h.id, "score": h.score, "payload": h.payload}
-            p = h.payload
-            if self.repo_path and p.get("path") and p.get("block_lines"):
-                file_path = os.path.join(self.repo_path, p["path"])
-                logger.debug(f"file path for Retriever{file_path}")
-                try:
-                    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+    def _annotate_hit(self, h, sources: Optional[Dict[str, Tuple[bytes, List[int]]]] = None) -> Dict[str, Any]:
+        """Attach block/focus text to a hit; `sources` caches (raw bytes, line starts) across the hits of one search.
+
+        Files stay undecoded; only the returned block/focus slices are decoded.
+        """
+        item = {"id": h.id, "score": h.score, "payload": h.payload}
+        p = h.payload
+        if self.repo_path and p.get("path") and p.get("block_lines"):
+            file_path = os.path.join(self.repo_path, p["path"])
+            logger.debug(f"file path for Retriever{file_path}")
+            try:
+                cached = sources.get(file_path) if sources is not None else None
+                if cached is None:
+                    with open(file_path, "rb") as f:
                         src = f.read()
-                    bl = p["block_lines"]
-                    if bl:
-                        b_start, b_end = bl
-                        b_beg = _line_to_byte(src, b_start)
-                        b_fin = _line_to_byte(src, b_end + 1)
-                        item["block_text"] = src[b_beg:b_fin]
-                        l = p.get("lines")
-                        if l:
-                            s, e = l
-                            s_b = _line_to_byte(src, s)
-                            e_b = _line_to_byte(src, e + 1)
-                            item["focus_text"] = src[s_b:e_b]
-                except Exception as e:
-                    logger.error(f"file open error {e}")
-                    pass
-            results.append(item)
-        return results
+                    cached = (src, _line_starts(src))
+                    if sources is not None:
+                        sources[file_path] = cached
+                src, starts = cached
+                bl = p["block_lines"]
+                if bl:
+                    b_start, b_end = bl
+                    b_beg = _line_to_byte(src, b_start, starts)
+                    b_fin = _line_to_byte(src, b_end + 1, starts)
+                    item["block_text"] = src[b_beg:b_fin].decode("utf-8", errors="ignore")
+                    l = p.get("lines")
+                    if l:
+                        s, e = l
+                        s_b = _line_to_byte(src, s, starts)
+                        e_b = _line_to_byte(src, e + 1, starts)
+                        item["focus_text"] = src[s_b:e_b].decode("utf-8", errors="ignore")
+            except Exception as e:
+                logger.error(f"file open error {e}")
+                pass
+        return item
 
 # ----------------------- helpers -----------------------
-def _line_to_byte(src: str, line_no: int) -> int:
+def _line_starts(src: Union[str, bytes]) -> List[int]:
+    """Offset at which each line begins (entry 0 is line 1), split on "\\n" like `_line_to_byte`."""
+    nl = b"\n" if isinstance(src, bytes) else "\n"
+    starts = [0]
+    idx = src.find(nl)
+    while idx != -1:
+        starts.append(idx + 1)
+        idx = src.find(nl, idx + 1)
+    return starts
+
+def _line_to_byte(src: str, line_no: int, starts: Optional[List[int]] = None) -> int:
     if line_no <= 1:
         return 0
+    if starts is not None:
+        return starts[line_no - 1] if line_no <= len(starts) else len(src)
     idx = 0
     cur = 1
     while cur < line_no and idx < len(src):
@@ -1158,8 +2093,18 @@ def _line_to_byte(src: str, line_no: int) -> int:
         cur += 1
     return idx
 
-def _byte_to_line(src: str, byte_off: int) -> int:
-    return src.count("\n", 0, max(0, min(byte_off, len(src)))) + 1
+def _byte_to_line(src: str, byte_off: int, starts: Optional[List[int]] = None) -> int:
+    byte_off = max(0, min(byte_off, len(src)))
+    if starts is not None:
+        return bisect.bisect_right(starts, byte_off)
+    return src.count("\n", 0, byte_off) + 1
+
+def _span_to_lines(src: str, start: int, end: int, starts: Optional[List[int]] = None) -> Tuple[int, int]:
+    """(first, last) line of src[start:end]; with a `_line_starts` table both ends are binary searches."""
+    first = _byte_to_line(src, start, starts)
+    if starts is not None:
+        return first, _byte_to_line(src, end, starts) - 1
+    return first, first + src.count("\n", start, end) - 1
 
 def _py_signature_str(node: ast.AST) -> str:
     if isinstance(node, ast.ClassDef):
@@ -1171,18 +2116,53 @@ def _py_signature_str(node: ast.AST) -> str:
         return f"def {node.name}({','.join(args)})->{ret}"
     return ""
 
+
+# Node types that count as an enclosing block (Python: class_definition, function_definition).
+_TS_BLOCK_TYPES = frozenset(
+    ("class_declaration", "impl_item", "trait_item", "struct_item", "enum_item", "function_definition", "class_definition")
+)
+
+
+@functools.lru_cache(maxsize=32)
+def _ts_language(lang: str):
+    return get_language(lang)
+
+
+_TS_PARSERS = threading.local()
+
+
+def _ts_parser(lang: str) -> "Parser":
+    """Parser bound to `lang`, built once per thread: parsers are reusable across parse() calls but not thread-safe."""
+    parsers = getattr(_TS_PARSERS, "by_lang", None)
+    if parsers is None:
+        parsers = _TS_PARSERS.by_lang = {}
+    parser = parsers.get(lang)
+    if parser is None:
+        parser = Parser()
+        parser.set_language(_ts_language(lang))
+        parsers[lang] = parser
+    return parser
+
+
+_TS_NAME_FIELDS = frozenset(("name", "declarator", "type", "trait", "item"))
+_TS_IDENTIFIER_TYPES = frozenset(("identifier", "type_identifier", "scoped_identifier"))
+# Matched against the encoded source with pos/endpos, so no per-child slice or decode is needed.
+_IDENTIFIER_RE = re.compile(rb"[A-Za-z_][A-Za-z0-9_]*")
+
+
 def _ts_first_identifier(node, bsrc: bytes) -> Optional[str]:
+    # Most grammars tag the declared name with a "name" field; the field lookup avoids scanning children
+    # and skips return types or modifiers that precede the name (e.g. Java methods).
+    name = node.child_by_field_name("name")
+    if name is not None:
+        m = _IDENTIFIER_RE.search(bsrc, name.start_byte, name.end_byte)
+        if m:
+            return m.group(0).decode('ascii')
     for c in node.children:
-        if getattr(c, 'field_name', None) in ("name", "declarator", "type", "trait", "item"):
-            txt = bsrc[c.start_byte:c.end_byte].decode('utf-8', errors='ignore')
-            m = re.search(r"[A-Za-z_][A-Za-z0-9_]*", txt)
-            if m:
-                return m.group(0)
-        if c.type in ("identifier", "type_identifier", "scoped_identifier"):
-            txt = bsrc[c.start_byte:c.end_byte].decode('utf-8', errors='ignore')
-            m = re.search(r"[A-Za-z_][A-Za-z0-9_]*", txt)
+        if getattr(c, 'field_name', None) in _TS_NAME_FIELDS or c.type in _TS_IDENTIFIER_TYPES:
+            m = _IDENTIFIER_RE.search(bsrc, c.start_byte, c.end_byte)
             if m:
-                return m.group(0)
+                return m.group(0).decode('ascii')
     return None
 
 
@@ -1201,6 +2181,18 @@ if __name__ == "__main__":
     parser.add_argument("--tei-base", default=os.getenv("TEI_BASE_URL", "http://localhost:8080/v1"))
     parser.add_argument("--tei-model", default=os.getenv("TEI_MODEL", os.getenv("TEI_MODEL_NAME", "text-embedding-3-large")))
     parser.add_argument("--dim", type=int, default=None, help="vector dimension when creating collection")
+    parser.add_argument(
+        "--quantization",
+        choices=("none", "scalar", "binary"),
+        default=os.getenv("QUANT_MODE", "scalar").strip().lower() or "none",
+        help="quantization for a newly created collection (default: QUANT_MODE)",
+    )
+    parser.add_argument(
+        "--vector-datatype",
+        choices=("float32", "float16"),
+        default=os.getenv("VECTOR_DATATYPE", "float16").strip().lower(),
+        help="storage type for vectors of a newly created collection (default: VECTOR_DATATYPE)",
+    )
     args = parser.parse_args()
 
     if not (args.repo and args.head):
@@ -1208,10 +2200,18 @@ if __name__ == "__main__":
 
     emb = Embeddings(base_url=args.tei_base, model=args.tei_model, api_key=os.getenv("OPENAI_API_KEY", ""))
     if args.collection == "auto":
-        modelslug = re.sub(r"[^a-z0-9]+", "", args.tei_model.lower())
-        repopart = re.sub(r"[^a-z0-9]+", "-", args.repo_name.lower())
+        non_slug = re.compile(r"[^a-z0-9]+")
+        modelslug = non_slug.sub("", args.tei_model.lower())
+        repopart = non_slug.sub("-", args.repo_name.lower())
         args.collection = f"{args.env}-{modelslug}-{repopart}"
-    store = VectorStore(collection=args.collection, url=args.qdrant_url, api_key=args.qdrant_key, dim=args.dim)
+    store = VectorStore(
+        collection=args.collection,
+        url=args.qdrant_url,
+        api_key=args.qdrant_key,
+        dim=args.dim,
+        quant_mode=args.quantization,
+        vector_datatype=args.vector_datatype,
+    )
 
     indexer = Indexer(repo_path=args.repo, repo_name=args.repo_name, embeddings=emb, store=store, collection=args.collection)
     if store.is_new:
@@ -1224,4 +2224,4 @@ if __name__ == "__main__":
 
     r = Retriever(store, emb, repo_path=args.repo)
     out = r.search("initialize controller", k=5)
-    print(json.dumps(out, ensure_ascii=False, indent=2))
+    sys.stdout.buffer.write(orjson.dumps(out, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE))
@@ -5,10 +5,20 @@ import threading
 from typing import Dict, Set, Tuple
 
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams
 
 from server.config import Config
-from .git_aware_code_indexer import Embeddings, VectorStore
+from .git_aware_code_indexer import (
+    QDRANT_GRPC_PORT,
+    QDRANT_PREFER_GRPC,
+    QDRANT_TIMEOUT,
+    Embeddings,
+    VectorStore,
+    create_payload_indexes,
+    hnsw_config,
+    quantization_config,
+    restore_stalled_indexing,
+    vector_params,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +40,9 @@ class Initializer:
             self._qdrant_admin = QdrantClient(
                 url=self.config.QDRANT_URL,
                 api_key=self.config.QDRANT_API_KEY,
+                timeout=QDRANT_TIMEOUT,
+                prefer_grpc=QDRANT_PREFER_GRPC,
+                grpc_port=QDRANT_GRPC_PORT,
             )
         return self._qdrant_admin
 
@@ -52,11 +65,18 @@ class Initializer:
 
             admin = self._qdrant()
             try:
-                admin.get_collection(collection_name=collection_name)
+                info = admin.get_collection(collection_name=collection_name)
+            except Exception:
+                info = None
+            if info is not None:
+                # Collections created before a filter field was added get its index on first use.
+                create_payload_indexes(admin, collection_name, existing=list(info.payload_schema or {}))
+                if info.config.optimizer_config.indexing_threshold == 0 and restore_stalled_indexing(
+                    admin, self.config.QDRANT_URL, collection_name
+                ):
+                    logger.warning("Re-enabled indexing on '%s' left paused by an interrupted load.", collection_name)
                 self._collection_ready.add(collection_name)
                 return
-            except Exception:
-                pass
 
             if not self.config.DIM:
                 logger.info("DIM not set; computing dynamically from sample embedding.")
@@ -65,12 +85,33 @@ class Initializer:
             else:
                 dynamic_dim = self.config.DIM
 
-            admin.create_collection(
-                collection_name=collection_name,
-                vectors_config=VectorParams(size=dynamic_dim, distance=Distance.COSINE),
-            )
+            try:
+                admin.create_collection(
+                    collection_name=collection_name,
+                    vectors_config=vector_params(dynamic_dim, self.config.QUANT_MODE, self.config.VECTOR_DATATYPE),
+                    quantization_config=quantization_config(self.config.QUANT_MODE),
+                    hnsw_config=hnsw_config(),
+                    on_disk_payload=True,
+                )
+            except Exception as exc:
+                # Another server worker may have created it first ("already exists"); only fail if it is absent.
+                try:
+                    admin.get_collection(collection_name=collection_name)
+                except Exception:
+                    raise exc
+                logger.info("Collection '%s' was created concurrently; reusing it.", collection_name)
+                create_payload_indexes(admin, collection_name)
+                self._collection_ready.add(collection_name)
+                return
+            create_payload_indexes(admin, collection_name)
             self._collection_ready.add(collection_name)
-            logger.info("Created collection '%s' with dim=%s", collection_name, dynamic_dim)
+            logger.info(
+                "Created collection '%s' with dim=%s datatype=%s quantization=%s",
+                collection_name,
+                dynamic_dim,
+                self.config.VECTOR_DATATYPE,
+                self.config.QUANT_MODE,
+            )
 
     def get_vector_store(self, collection_name: str, embedding_model: str) -> VectorStore:
         self.ensure_collection(collection_name, embedding_model)
@@ -82,6 +123,9 @@ class Initializer:
                     url=self.config.QDRANT_URL,
                     api_key=self.config.QDRANT_API_KEY,
                     dim=self.config.DIM,
+                    quant_mode=self.config.QUANT_MODE,
+                    vector_datatype=self.config.VECTOR_DATATYPE,
+                    client=self._qdrant(),
                 )
                 self._vector_store_cache[collection_name] = store
             return store
@@ -94,6 +138,23 @@ class Initializer:
     def ensure_default_collection(self) -> None:
         self.ensure_collection(self.config.COLLECTION, self.config.EMB_MODEL)
 
+    async def aclose(self) -> None:
+        """Release pooled embedding and async Qdrant connections on application shutdown."""
+        with self._cache_lock:
+            clients = list(self._embedding_cache.values())
+            stores = list(self._vector_store_cache.values())
+        for client in clients:
+            try:
+                await client.aclose()
+                client.close()
+            except Exception:
+                logger.debug("Failed to close embedding client for %s.", client.model, exc_info=True)
+        for store in stores:
+            try:
+                await store.aclose()
+            except Exception:
+                logger.debug("Failed to close async Qdrant client for %s.", store.collection, exc_info=True)
+
     def reset(self) -> None:
         """Clear cached clients and collection state after datastore resets."""
         with self._cache_lock:
@@ -1,28 +1,74 @@
 from __future__ import annotations
 
+import fcntl
 import json
+import os
+import tempfile
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Tuple
+
+# Parsed state keyed by path and validated against the file's stat: save_state always swaps in a new inode, so a
+# changed (inode, mtime, size) means another writer (thread or worker process) replaced it.
+_STATE_CACHE: Dict[str, Tuple[Tuple[int, int, int], Dict[str, str]]] = {}
 
 
 def load_state(state_file: Path) -> Dict[str, str]:
-    if state_file.exists():
-        return json.loads(state_file.read_text())
-    return {}
+    key = os.fspath(state_file)
+    try:
+        st = os.stat(key)
+    except FileNotFoundError:
+        _STATE_CACHE.pop(key, None)
+        return {}
+    sig = (st.st_ino, st.st_mtime_ns, st.st_size)
+    cached = _STATE_CACHE.get(key)
+    if cached is None or cached[0] != sig:
+        cached = (sig, json.loads(Path(state_file).read_text()))
+        _STATE_CACHE[key] = cached
+    return dict(cached[1])
 
 
 def save_state(state_file: Path, state: Dict[str, str]) -> None:
-    state_file.write_text(json.dumps(state))
+    # Write a sibling temp file and rename it over the old state so a crash never leaves truncated JSON behind.
+    state_file = Path(state_file)
+    fd, tmp_path = tempfile.mkstemp(dir=state_file.parent, prefix=f".{state_file.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as fh:
+            fh.write(json.dumps(state))
+        os.replace(tmp_path, state_file)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+@contextmanager
+def _state_lock(state_file: Path):
+    # Server workers are separate processes; flock the state file's directory (the file itself is swapped out by
+    # save_state) so concurrent read-modify-write cycles cannot drop each other's commits.
+    fd = os.open(Path(state_file).parent, os.O_RDONLY)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def update_state(state_file: Path, repo_id: str, commit: str) -> None:
+    with _state_lock(state_file):
+        state = load_state(state_file)
+        if state.get(repo_id) == commit:
+            return
+        state[repo_id] = commit
+        save_state(state_file, state)
 
 
 def sync_state_with_registry(state_file: Path, repo_id: str, last_indexed_commit: str | None) -> None:
     if not last_indexed_commit:
         return
-    state = load_state(state_file)
-    if state.get(repo_id) == last_indexed_commit:
-        return
-    state[repo_id] = last_indexed_commit
-    save_state(state_file, state)
+    update_state(state_file, repo_id, last_indexed_commit)
 
 
 def list_git_repositories(repos_dir: Path) -> List[str]:
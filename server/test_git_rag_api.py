@@ -13,6 +13,9 @@ REPO_PATH = REPOS_DIR / REPO_ID
 STATE_FILE = Path(os.getenv("STATE_FILE", "index_state.json"))
 BRANCH = "head"
 
+# 모든 API 호출이 같은 서버로 가므로 커넥션을 재사용합니다 (keep-alive).
+SESSION = requests.Session()
+
 # --- 유틸리티 함수 ---
 
 def run_git(*args):
@@ -32,9 +35,9 @@ def api_call(method, endpoint, json_data=None):
     print(f"\n[API 호출] {method} {url}")
     try:
         if method == "POST":
-            response = requests.post(url, json=json_data, timeout=30) # 인덱싱은 시간이 더 걸릴 수 있으므로 타임아웃 증가
+            response = SESSION.post(url, json=json_data, timeout=30) # 인덱싱은 시간이 더 걸릴 수 있으므로 타임아웃 증가
         elif method == "GET":
-            response = requests.get(url, timeout=10)
+            response = SESSION.get(url, timeout=10)
         else:
             raise ValueError("지원되지 않는 메소드")
             
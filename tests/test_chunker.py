@@ -0,0 +1,14 @@
+from server.services.git_aware_code_indexer import Chunker
+
+
+def test_generic_chunks_slice_source_by_line_windows():
+    src = "".join(f"line {i}\n" for i in range(1, 251)) + "tail"
+
+    chunks = Chunker.generic_chunks(src, "notes.txt", "demo", lines_per_chunk=100)
+
+    assert [c.symbol for c in chunks] == ["range:0001-0100", "range:0101-0200", "range:0201-0251"]
+    assert "".join(c.content for c in chunks) == src
+    for chunk in chunks:
+        assert src[chunk.range.byte_start:chunk.range.byte_end] == chunk.content
+    assert chunks[-1].range.byte_end == len(src)
+    assert chunks[1].content.startswith("line 101\n")
@@ -1,10 +1,17 @@
+from contextlib import nullcontext
+from types import SimpleNamespace
+
 from server.services.android_plugins import AndroidChunkPlugin, AndroidPayloadPlugin
-from server.services.git_aware_code_indexer import Indexer
+from server.services.git_aware_code_indexer import Chunker, Indexer
 from server.services.edges import EdgeType, build_edge
 
 
 class DummyEmbeddings:
+    def __init__(self):
+        self.calls = []
+
     def embed(self, texts):
+        self.calls.append(list(texts))
         return [[0.0]] * len(texts)
 
 
@@ -15,6 +22,29 @@ class DummyStore:
     def upsert_points(self, points, batch_size=None):
         self.points.extend(points)
 
+    def upsert_batch(self, ids, vectors, payloads, batch_size=None):
+        self.points.extend(SimpleNamespace(id=i, vector=v, payload=p) for i, v, p in zip(ids, vectors, payloads))
+
+    def bulk_load(self):
+        return nullcontext()
+
+    def latest_by_path(self, repo, paths, fields=None):
+        grouped = {path: {} for path in paths}
+        for p in self.points:
+            if p.payload.get("is_latest") and p.payload.get("repo") == repo and p.payload.get("path") in grouped:
+                grouped[p.payload["path"]].setdefault(p.payload["logical_id"], []).append(p)
+        return grouped
+
+    def set_payloads(self, updates):
+        for ids, payload in updates:
+            for p in self.points:
+                if p.id in ids:
+                    p.payload.update(payload)
+
+    def vectors_by_content_hash(self, content_hashes):
+        wanted = set(content_hashes)
+        return {p.payload["content_hash"]: p.vector for p in self.points if p.payload.get("content_hash") in wanted}
+
 
 def _collect_edges(store: DummyStore):
     for point in store.points:
@@ -134,3 +164,81 @@ def test_stub_stack_edge_plugin_runs(git_repo):
     # Ensure stack typing carried through payload.
     for point in store.points:
         assert point.payload.get("stack_type") == "web_frontend"
+
+
+def test_full_index_reuses_vectors_of_already_indexed_content(git_repo):
+    git_repo.write("web/index.html", "<a href=\"/home\">Home</a>")
+    head = git_repo.commit_all("Add web page")
+
+    store = DummyStore()
+    emb = DummyEmbeddings()
+    indexer = Indexer(
+        repo_path=str(git_repo.path),
+        repo_name=git_repo.repo_id,
+        embeddings=emb,
+        store=store,
+        collection="test",
+        payload_plugins=[StubPayloadPlugin()],
+        chunk_plugins=[],
+        stack_type="web_frontend",
+        edge_plugins=[],
+    )
+
+    indexer.full_index(head, branch=git_repo.branch)
+    embedded = sum(len(call) for call in emb.calls)
+    indexer.full_index(head, branch=git_repo.branch)
+
+    assert embedded > 0
+    assert sum(len(call) for call in emb.calls) == embedded
+    assert len(store.points) == 2 * embedded
+
+
+def test_index_commit_retires_logical_ids_no_longer_produced_for_a_file(git_repo):
+    old_src = "def keep():\n    return 1\n\n\ndef gone():\n    return 2\n"
+    new_src = "def keep():\n    return 1\n"
+    git_repo.write("app.py", old_src)
+    base = git_repo.commit_all("two functions")
+    git_repo.write("app.py", new_src)
+    head = git_repo.commit_all("drop gone")
+
+    store = DummyStore()
+    indexer = Indexer(
+        repo_path=str(git_repo.path),
+        repo_name=git_repo.repo_id,
+        embeddings=DummyEmbeddings(),
+        store=store,
+        collection="test",
+    )
+    indexer.full_index(base, branch=git_repo.branch)
+    indexer.index_commit(base, head, branch=git_repo.branch)
+
+    head_ids = {c.logical_id for c in Chunker.chunks(new_src, "app.py", git_repo.repo_id)}
+    stale_ids = {c.logical_id for c in Chunker.chunks(old_src, "app.py", git_repo.repo_id)} - head_ids
+    latest = {p.payload["logical_id"] for p in store.points if p.payload["is_latest"]}
+    assert stale_ids
+    assert latest == head_ids
+
+
+def test_full_index_retires_points_left_over_from_an_earlier_index(git_repo):
+    old_src = "def keep():\n    return 1\n\n\ndef gone():\n    return 2\n"
+    new_src = "def keep():\n    return 1\n"
+    git_repo.write("app.py", old_src)
+    base = git_repo.commit_all("two functions")
+    git_repo.write("app.py", new_src)
+    head = git_repo.commit_all("drop gone")
+
+    store = DummyStore()
+    indexer = Indexer(
+        repo_path=str(git_repo.path),
+        repo_name=git_repo.repo_id,
+        embeddings=DummyEmbeddings(),
+        store=store,
+        collection="test",
+    )
+    indexer.full_index(base, branch=git_repo.branch)
+    indexer.full_index(head, branch=git_repo.branch)
+
+    head_chunks = Chunker.chunks(new_src, "app.py", git_repo.repo_id)
+    latest = [p for p in store.points if p.payload["is_latest"]]
+    assert {p.payload["logical_id"] for p in latest} == {c.logical_id for c in head_chunks}
+    assert {p.payload["content_hash"] for p in latest} == {c.content_hash for c in head_chunks}
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from server.services.embedding_batcher import EmbeddingBatcher
+from server.services.embedding_cache import QueryEmbeddingCache
+
+
+class RecordingEmbeddings:
+    def __init__(self, fail: bool = False):
+        self.calls = []
+        self.fail = fail
+
+    async def aembed(self, texts):
+        self.calls.append(list(texts))
+        if self.fail:
+            raise RuntimeError("tei down")
+        return [[float(len(t))] for t in texts]
+
+
+class StubInitializer:
+    def __init__(self, clients):
+        self.clients = clients
+
+    def get_embeddings_client(self, model_name):
+        return self.clients[model_name]
+
+
+def test_concurrent_queries_share_one_embedding_call():
+    emb = RecordingEmbeddings()
+    batcher = EmbeddingBatcher(StubInitializer({"m": emb}), max_batch=8, max_wait_ms=20)
+
+    async def run():
+        try:
+            return await asyncio.gather(
+                batcher.embed_one("m", "a"),
+                batcher.embed_one("m", "bbb"),
+                batcher.embed_one("m", "cc"),
+            )
+        finally:
+            await batcher.aclose()
+
+    results = asyncio.run(run())
+
+    assert results == [[1.0], [3.0], [2.0]]
+    assert emb.calls == [["a", "bbb", "cc"]]
+
+
+def test_batches_are_split_per_model():
+    first, second = RecordingEmbeddings(), RecordingEmbeddings()
+    batcher = EmbeddingBatcher(StubInitializer({"a": first, "b": second}), max_batch=8, max_wait_ms=20)
+
+    async def run():
+        try:
+            return await asyncio.gather(batcher.embed_one("a", "x"), batcher.embed_one("b", "yy"))
+        finally:
+            await batcher.aclose()
+
+    assert asyncio.run(run()) == [[1.0], [2.0]]
+    assert first.calls == [["x"]]
+    assert second.calls == [["yy"]]
+
+
+def test_backend_errors_propagate_to_callers():
+    batcher = EmbeddingBatcher(StubInitializer({"m": RecordingEmbeddings(fail=True)}), max_wait_ms=1)
+
+    async def run():
+        try:
+            await batcher.embed_one("m", "boom")
+        finally:
+            await batcher.aclose()
+
+    with pytest.raises(RuntimeError, match="tei down"):
+        asyncio.run(run())
+
+
+def test_repeated_queries_are_served_from_cache():
+    emb = RecordingEmbeddings()
+    batcher = EmbeddingBatcher(StubInitializer({"m": emb}), max_wait_ms=1, cache=QueryEmbeddingCache(maxsize=8))
+
+    async def run():
+        try:
+            first = await batcher.embed_many("m", ["abc", " abc ", "de"])
+            second = await batcher.embed_one("m", "abc")
+            bypass = await batcher.embed_one("m", "abc", use_cache=False)
+            return first, second, bypass
+        finally:
+            await batcher.aclose()
+
+    first, second, bypass = asyncio.run(run())
+
+    assert first == [[3.0], [3.0], [2.0]]
+    assert second == [3.0]
+    assert bypass == [3.0]
+    assert emb.calls == [["abc", "de"], ["abc"]]
+
+
+def test_query_cache_evicts_lru_and_expired_entries():
+    now = [0.0]
+    cache = QueryEmbeddingCache(maxsize=2, ttl_s=10, clock=lambda: now[0])
+    cache.put("m", "a", [1.0])
+    cache.put("m", "b", [2.0])
+    assert cache.get("m", "a") == [1.0]
+    cache.put("m", "c", [3.0])
+
+    assert cache.get("m", "b") is None
+    assert cache.get("m", "a") == [1.0]
+    assert cache.get("other", "a") is None
+
+    now[0] = 11.0
+    assert cache.get("m", "c") is None
+    assert len(cache) == 1
@@ -0,0 +1,104 @@
+from types import SimpleNamespace
+
+import httpx
+from openai import APIStatusError
+
+from server.services.git_aware_code_indexer import Embeddings
+
+
+class FakeEmbeddingsAPI:
+    def __init__(self):
+        self.calls = []
+
+    def create(self, input, model, **kwargs):
+        self.calls.append(list(input))
+        return SimpleNamespace(data=[SimpleNamespace(embedding=[float(len(t))]) for t in input])
+
+
+class PayloadLimitedEmbeddingsAPI(FakeEmbeddingsAPI):
+    def __init__(self, max_inputs: int):
+        super().__init__()
+        self.max_inputs = max_inputs
+
+    def create(self, input, model, **kwargs):
+        if len(input) > self.max_inputs:
+            self.calls.append(list(input))
+            response = httpx.Response(413, request=httpx.Request("POST", "http://tei/v1/embeddings"))
+            raise APIStatusError("payload too large", response=response, body=None)
+        return super().create(input, model, **kwargs)
+
+
+def _embeddings(
+    batch_size: int = 8, token_budget: int = 512, batch_token_budget: int = 4096, concurrency: int = 1
+) -> Embeddings:
+    emb = Embeddings.__new__(Embeddings)
+    emb.model = "test-model"
+    emb.encoding = None
+    emb.batch_size = batch_size
+    emb.token_budget = token_budget
+    emb.batch_token_budget = batch_token_budget
+    emb.concurrency = concurrency
+    emb._create_kwargs = {}
+    emb.client = SimpleNamespace(embeddings=FakeEmbeddingsAPI())
+    return emb
+
+
+def test_embed_sends_each_distinct_text_once():
+    emb = _embeddings()
+
+    vectors = emb.embed(["header", "body", "header", "x", "body"])
+
+    assert len(emb.client.embeddings.calls) == 1
+    assert sorted(emb.client.embeddings.calls[0]) == ["body", "header", "x"]
+    assert vectors == [[6.0], [4.0], [6.0], [1.0], [4.0]]
+
+
+def test_embed_batches_by_length_and_restores_input_order():
+    emb = _embeddings(batch_size=2)
+    texts = ["a" * 40, "b", "c" * 20, "dd"]
+
+    vectors = emb.embed(texts)
+
+    assert emb.client.embeddings.calls == [["b", "dd"], ["c" * 20, "a" * 40]]
+    assert vectors == [[40.0], [1.0], [20.0], [2.0]]
+
+
+def test_embed_packs_many_texts_per_request_within_token_budget():
+    emb = _embeddings(batch_size=64, token_budget=512, batch_token_budget=1024)
+    texts = [f"chunk-{i}" * 10 for i in range(20)]
+
+    vectors = emb.embed(texts)
+
+    assert len(emb.client.embeddings.calls) == 1
+    assert vectors == [[float(len(t))] for t in texts]
+
+
+def test_embed_halves_batch_rejected_as_too_large():
+    emb = _embeddings()
+    emb.client = SimpleNamespace(embeddings=PayloadLimitedEmbeddingsAPI(max_inputs=2))
+    texts = ["a", "bb", "ccc", "dddd", "eeeee"]
+
+    vectors = emb.embed(texts)
+
+    assert vectors == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+    assert emb.client.embeddings.calls[0] == texts
+
+
+def test_embed_concurrent_batches_keep_input_order():
+    emb = _embeddings(batch_size=1, concurrency=4)
+    texts = ["a" * n for n in (5, 3, 9, 1, 7, 2)]
+
+    vectors = emb.embed(texts)
+
+    assert len(emb.client.embeddings.calls) == len(texts)
+    assert vectors == [[5.0], [3.0], [9.0], [1.0], [7.0], [2.0]]
+
+
+def test_embed_keeps_order_around_text_over_token_budget():
+    emb = _embeddings(batch_size=8, token_budget=16)
+    texts = ["a" * 8, "b" * 200, "c" * 12]
+
+    vectors = emb.embed(texts)
+
+    assert vectors == [[8.0], [200.0], [12.0]]
+    assert emb.client.embeddings.calls[-1] == ["b" * 200]
@@ -0,0 +1,65 @@
+from server.services.git_aware_code_indexer import GitCLI
+
+
+def test_show_file_reads_blobs_from_batch_process(git_repo):
+    git_repo.write("pkg/a file.py", "def a():\n    return 1\n")
+    git_repo.write("b.py", "B = 2\n")
+    first = git_repo.commit_all("first")
+    git_repo.write("b.py", "B = 3\n")
+    second = git_repo.commit_all("second")
+
+    git = GitCLI(str(git_repo.path))
+    try:
+        assert git.show_file(first, "pkg/a file.py") == "def a():\n    return 1\n"
+        assert git.show_file(first, "b.py") == "B = 2\n"
+        assert git.show_file(second, "b.py") == "B = 3\n"
+        assert git.show_file(second, "missing.py") is None
+        # The batch process survives a miss and keeps serving reads.
+        assert git.show_file(second, "pkg/a file.py") == "def a():\n    return 1\n"
+    finally:
+        git.close()
+
+
+def test_show_file_skips_binary_blobs(git_repo):
+    (git_repo.path / "logo.png").write_bytes(b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR" + bytes(range(256)))
+    head = git_repo.commit_all("binary")
+
+    git = GitCLI(str(git_repo.path))
+    try:
+        assert git.show_file(head, "logo.png") is None
+    finally:
+        git.close()
+
+
+def test_list_files_keeps_unusual_paths_verbatim(git_repo):
+    names = ["plain.py", "with space.py", "quote\"d.py", "한글.py"]
+    for name in names:
+        git_repo.write(name, "x = 1\n")
+    head = git_repo.commit_all("unusual names")
+
+    git = GitCLI(str(git_repo.path))
+    try:
+        assert sorted(git.list_files(head)) == sorted(names)
+        assert sorted(git.list_files()) == sorted(names)
+        assert git.show_file(head, "한글.py") == "x = 1\n"
+    finally:
+        git.close()
+
+
+def test_show_file_reuses_blobs_of_immutable_commits(git_repo, monkeypatch):
+    git_repo.write("a.py", "A = 1\n")
+    head = git_repo.commit_all("first")
+
+    first = GitCLI(str(git_repo.path))
+    try:
+        assert first.show_file(head, "a.py") == "A = 1\n"
+    finally:
+        first.close()
+
+    def no_git(*args, **kwargs):
+        raise AssertionError("blob should be served from the cache")
+
+    second = GitCLI(str(git_repo.path))
+    monkeypatch.setattr(second, "_cat_file", no_git)
+    monkeypatch.setattr(second, "_run_bytes", no_git)
+    assert second.show_file(head, "a.py") == "A = 1\n"
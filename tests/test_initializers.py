@@ -0,0 +1,103 @@
+from types import SimpleNamespace
+
+import pytest
+
+from server.config import Config
+from server.services import git_aware_code_indexer
+from server.services.git_aware_code_indexer import PAYLOAD_INDEX_FIELDS, QDRANT_INDEXING_THRESHOLD, VectorStore
+from server.services.initializers import Initializer
+
+
+@pytest.fixture(autouse=True)
+def bulk_load_lock_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(git_aware_code_indexer, "BULK_LOAD_LOCK_DIR", str(tmp_path))
+
+
+class RacingQdrantClient:
+    """Admin client for a collection another worker creates between our lookup and our create."""
+
+    def __init__(self):
+        self.exists = False
+        self.index_calls = []
+
+    def get_collection(self, collection_name):
+        if not self.exists:
+            self.exists = True
+            raise RuntimeError("Not found")
+        return SimpleNamespace(payload_schema={})
+
+    def create_collection(self, collection_name, **kwargs):
+        raise RuntimeError(f"Collection `{collection_name}` already exists!")
+
+    def create_payload_index(self, collection_name, field_name, field_schema):
+        self.index_calls.append(field_name)
+        raise RuntimeError("index already exists")
+
+
+def test_ensure_collection_reuses_collection_created_by_another_worker(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOST_REPO_PATH", str(tmp_path))
+    cfg = Config()
+    cfg.DIM = 8
+    initializer = Initializer(cfg)
+    admin = RacingQdrantClient()
+    initializer._qdrant_admin = admin
+
+    initializer.ensure_collection("demo", "demo-model")
+
+    assert "demo" in initializer._collection_ready
+    assert admin.index_calls
+
+
+class IndexedQdrantClient:
+    def __init__(self, payload_schema, threshold=20000):
+        self.payload_schema = payload_schema
+        self.threshold = threshold
+        self.index_calls = []
+
+    def get_collection(self, collection_name):
+        return SimpleNamespace(
+            config=SimpleNamespace(optimizer_config=SimpleNamespace(indexing_threshold=self.threshold)),
+            payload_schema=self.payload_schema,
+        )
+
+    def create_payload_index(self, collection_name, field_name, field_schema):
+        self.index_calls.append(field_name)
+
+    def update_collection(self, collection_name, optimizer_config):
+        self.threshold = optimizer_config.indexing_threshold
+
+
+def test_ensure_collection_adds_missing_payload_indexes_to_existing_collection(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOST_REPO_PATH", str(tmp_path))
+    initializer = Initializer(Config())
+    admin = IndexedQdrantClient(payload_schema={field: None for field in PAYLOAD_INDEX_FIELDS if field != "content_hash"})
+    initializer._qdrant_admin = admin
+
+    initializer.ensure_collection("demo", "demo-model")
+
+    assert admin.index_calls == ["content_hash"]
+
+
+def test_ensure_collection_reenables_indexing_left_paused_by_a_dead_worker(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOST_REPO_PATH", str(tmp_path))
+    initializer = Initializer(Config())
+    admin = IndexedQdrantClient(payload_schema={field: None for field in PAYLOAD_INDEX_FIELDS}, threshold=0)
+    initializer._qdrant_admin = admin
+
+    initializer.ensure_collection("demo", "demo-model")
+
+    assert admin.threshold == QDRANT_INDEXING_THRESHOLD
+
+
+def test_ensure_collection_keeps_indexing_paused_during_a_running_bulk_load(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOST_REPO_PATH", str(tmp_path))
+    cfg = Config()
+    initializer = Initializer(cfg)
+    admin = IndexedQdrantClient(payload_schema={field: None for field in PAYLOAD_INDEX_FIELDS}, threshold=50000)
+    initializer._qdrant_admin = admin
+    store = VectorStore(collection="demo", url=cfg.QDRANT_URL, client=admin)
+
+    with store.bulk_load():
+        initializer.ensure_collection("demo", "demo-model")
+        assert admin.threshold == 0
+    assert admin.threshold == 50000
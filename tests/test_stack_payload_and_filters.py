@@ -1,3 +1,7 @@
+import asyncio
+import builtins
+from types import SimpleNamespace
+
 from server.services.git_aware_code_indexer import Chunk, Range, Retriever, Indexer, sha256
 from qdrant_client.http.models import MatchAny
 
@@ -38,7 +42,7 @@ class DummyStore:
     def __init__(self):
         self.last_filter = None
 
-    def search(self, query_vector, k=5, filt=None):
+    def search(self, query_vector, k=5, filt=None, ef=None):
         self.last_filter = filt
         return []
 
@@ -69,3 +73,104 @@ def test_retriever_applies_stack_filters():
     assert "component_type" in keys
     assert "screen_name" in keys
     assert any(cond.key == "tags" and isinstance(cond.match, MatchAny) for cond in filt.must)
+
+
+def test_retriever_restricts_to_given_logical_ids():
+    store = DummyStore()
+    retriever = Retriever(store, DummyEmbeddings(), None)
+
+    retriever.search("find activity", repo="demo", logical_ids=["demo:b.py#f", "demo:a.py#g", "demo:b.py#f"])
+
+    conds = [cond for cond in store.last_filter.must if cond.key == "logical_id"]
+    assert len(conds) == 1
+    assert isinstance(conds[0].match, MatchAny)
+    assert conds[0].match.any == ["demo:a.py#g", "demo:b.py#f"]
+
+
+class DummyBatchStore:
+    def __init__(self):
+        self.calls = []
+
+    def search_batch(self, query_vectors, k=5, filt=None, ef=None):
+        self.calls.append((list(query_vectors), k, filt))
+        return [[] for _ in query_vectors]
+
+
+class RecordingEmbeddings:
+    def __init__(self):
+        self.calls = []
+
+    def embed(self, texts):
+        self.calls.append(list(texts))
+        return [[float(i)] for i, _ in enumerate(texts)]
+
+
+def test_retriever_search_batch_embeds_once_and_keeps_order():
+    store = DummyBatchStore()
+    emb = RecordingEmbeddings()
+    retriever = Retriever(store, emb, None)
+
+    results = retriever.search_batch(["first", "second", "third"], k=3, repo="demo")
+
+    assert results == [[], [], []]
+    assert emb.calls == [["first", "second", "third"]]
+    assert len(store.calls) == 1
+    vectors, k, filt = store.calls[0]
+    assert vectors == [[0.0], [1.0], [2.0]]
+    assert k == 3
+    assert any(cond.key == "repo" for cond in filt.must)
+
+
+class DummyAsyncStore:
+    def __init__(self):
+        self.calls = []
+
+    async def asearch(self, query_vector, k=5, filt=None, ef=None):
+        self.calls.append((query_vector, k, filt))
+        return []
+
+
+def test_retriever_asearch_uses_precomputed_vector():
+    store = DummyAsyncStore()
+    emb = RecordingEmbeddings()
+    retriever = Retriever(store, emb, None)
+
+    results = asyncio.run(retriever.asearch("query", k=2, repo="demo", query_vector=[0.5]))
+
+    assert results == []
+    assert emb.calls == []
+    vector, k, filt = store.calls[0]
+    assert vector == [0.5]
+    assert k == 2
+    assert any(cond.key == "repo" for cond in filt.must)
+
+
+class DummyHitStore:
+    def __init__(self, hits):
+        self.hits = hits
+
+    def search(self, query_vector, k=5, filt=None, ef=None):
+        return self.hits
+
+
+def test_retriever_reads_each_hit_file_once(tmp_path, monkeypatch):
+    (tmp_path / "a.py").write_text("def f():\n    return '한글'\n\ndef g():\n    return 2\n", encoding="utf-8")
+    hits = [
+        SimpleNamespace(id=1, score=0.9, payload={"path": "a.py", "block_lines": [1, 2], "lines": [2, 2]}),
+        SimpleNamespace(id=2, score=0.8, payload={"path": "a.py", "block_lines": [4, 5], "lines": [4, 5]}),
+    ]
+    retriever = Retriever(DummyHitStore(hits), DummyEmbeddings(), str(tmp_path))
+    opened = []
+    real_open = builtins.open
+
+    def counting_open(file, *args, **kwargs):
+        opened.append(file)
+        return real_open(file, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "open", counting_open)
+    results = retriever.search("query", k=2)
+
+    assert opened == [str(tmp_path / "a.py")]
+    assert results[0]["block_text"] == "def f():\n    return '한글'\n"
+    assert results[0]["focus_text"] == "    return '한글'\n"
+    assert results[1]["block_text"] == "def g():\n    return 2\n"
@@ -0,0 +1,43 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from server.services.state_manager import load_state, save_state, sync_state_with_registry, update_state
+
+
+def test_save_state_replaces_file_without_leftover_temp_files(tmp_path):
+    state_file = tmp_path / "index_state.json"
+    save_state(state_file, {"demo": "abc"})
+    sync_state_with_registry(state_file, "other", "def")
+
+    assert load_state(state_file) == {"demo": "abc", "other": "def"}
+    assert [p.name for p in tmp_path.iterdir()] == ["index_state.json"]
+
+
+def test_update_state_keeps_concurrent_writes_for_other_repos(tmp_path):
+    state_file = tmp_path / "index_state.json"
+    repos = [f"repo{i}" for i in range(16)]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda repo: update_state(state_file, repo, f"{repo}-head"), repos))
+
+    assert load_state(state_file) == {repo: f"{repo}-head" for repo in repos}
+    assert [p.name for p in tmp_path.iterdir()] == ["index_state.json"]
+
+
+def test_load_state_rereads_only_after_the_file_is_replaced(tmp_path, monkeypatch):
+    state_file = tmp_path / "index_state.json"
+    save_state(state_file, {"demo": "abc"})
+    assert load_state(state_file) == {"demo": "abc"}
+
+    reads = []
+    original = Path.read_text
+    monkeypatch.setattr(Path, "read_text", lambda self, *a, **kw: reads.append(self) or original(self, *a, **kw))
+
+    state = load_state(state_file)
+    state["demo"] = "mutated"
+    assert load_state(state_file) == {"demo": "abc"}
+    assert reads == []
+
+    save_state(state_file, {"demo": "def"})
+    assert load_state(state_file) == {"demo": "def"}
+    assert reads == [state_file]
@@ -0,0 +1,96 @@
+from types import SimpleNamespace
+
+import pytest
+
+from server.services import git_aware_code_indexer
+from server.services.git_aware_code_indexer import PAYLOAD_INDEX_FIELDS, QDRANT_INDEXING_THRESHOLD, VectorStore
+
+
+@pytest.fixture(autouse=True)
+def bulk_load_lock_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(git_aware_code_indexer, "BULK_LOAD_LOCK_DIR", str(tmp_path))
+
+
+class FakeQdrant:
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.updates = []
+
+    def get_collection(self, collection_name):
+        return SimpleNamespace(
+            config=SimpleNamespace(optimizer_config=SimpleNamespace(indexing_threshold=self.threshold)),
+            payload_schema={field: None for field in PAYLOAD_INDEX_FIELDS},
+        )
+
+    def update_collection(self, collection_name, optimizer_config):
+        self.threshold = optimizer_config.indexing_threshold
+        self.updates.append(self.threshold)
+
+
+def _store(client, collection="code"):
+    return VectorStore(collection=collection, url="http://qdrant:6333", client=client)
+
+
+def test_overlapping_bulk_loads_restore_indexing_once_at_the_end():
+    client = FakeQdrant(threshold=50000)
+    first, second = _store(client), _store(client)
+
+    with first.bulk_load():
+        with second.bulk_load():
+            assert client.threshold == 0
+        assert client.threshold == 0
+    assert client.threshold == 50000
+    assert client.updates == [0, 50000]
+
+
+def test_bulk_load_finishing_first_leaves_indexing_paused_for_the_later_one():
+    client = FakeQdrant(threshold=50000)
+    first, second = _store(client).bulk_load(), _store(client).bulk_load()
+
+    first.__enter__()
+    second.__enter__()
+    first.__exit__(None, None, None)
+    assert client.threshold == 0
+    second.__exit__(None, None, None)
+    # The later load read back 0, but restores the value the first one recorded.
+    assert client.threshold == 50000
+
+
+def test_bulk_load_restores_default_when_indexing_was_left_disabled():
+    client = FakeQdrant(threshold=0)
+
+    with _store(client).bulk_load():
+        assert client.threshold == 0
+    assert client.threshold == QDRANT_INDEXING_THRESHOLD
+
+
+class ScrollingQdrant(FakeQdrant):
+    def __init__(self, points):
+        super().__init__(threshold=20000)
+        self.points = points
+        self.scrolls = []
+
+    def count(self, collection_name, exact=True):
+        return SimpleNamespace(count=len(self.points))
+
+    def scroll(self, collection_name, scroll_filter, limit, offset=None, **kwargs):
+        self.scrolls.append(scroll_filter)
+        start = offset or 0
+        page = self.points[start:start + limit]
+        return page, start + limit
+
+
+def test_vectors_by_content_hash_skips_the_scroll_on_an_empty_collection():
+    client = ScrollingQdrant(points=[])
+
+    assert _store(client).vectors_by_content_hash(["h1", "h2"]) == {}
+    assert client.scrolls == []
+
+
+def test_vectors_by_content_hash_reads_latest_points_and_stops_on_a_short_page():
+    client = ScrollingQdrant(points=[SimpleNamespace(payload={"content_hash": "h1"}, vector=[1.0, 0.0])])
+
+    assert _store(client).vectors_by_content_hash(["h1", "h2"]) == {"h1": [1.0, 0.0]}
+    assert len(client.scrolls) == 1
+    keys = {cond.key: cond.match for cond in client.scrolls[0].must}
+    assert keys["is_latest"].value is True